@@ -1,9 +1,9 @@
 from rest_framework import serializers
 from .models import Cart, CartItem
-from products.serializers import ProductSerializer
+from products.serializers import ProductWithStockSerializer
 
 class CartItemSerializer(serializers.ModelSerializer):
-    product = ProductSerializer(read_only=True)
+    product = ProductWithStockSerializer(read_only=True)
     total_price = serializers.ReadOnlyField()
 
     class Meta:
@@ -16,7 +16,7 @@ class CartView(generics.RetrieveAPIView):
     def get_object(self):
         # Use select_related and prefetch_related to avoid caching issues
         cart, created = Cart.objects.prefetch_related(
-            'items__product'
+            'items__product__category'
         ).get_or_create(user=self.request.user)
         # Force refresh from database
         if not created:
@@ -1,9 +1,9 @@
 from rest_framework import serializers
 from .models import Favorite
-from products.serializers import ProductSerializer
+from products.serializers import ProductWithStockSerializer
 
 class FavoriteSerializer(serializers.ModelSerializer):
-    product = ProductSerializer(read_only=True)
+    product = ProductWithStockSerializer(read_only=True)
 
     class Meta:
         model = Favorite
@@ -41,6 +41,12 @@ class Order(models.Model):
     cri_amount_paid = models.DecimalField(max_digits=10, decimal_places=2, default=0, help_text="Amount paid now via CRI")
     cri_remaining = models.DecimalField(max_digits=10, decimal_places=2, default=0, help_text="Remaining unpaid amount (loan)")
     cri_remarque = models.TextField(blank=True, null=True, help_text="CRI payment note")
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of OrderListCreateView (pneushop/pagination.py)
+            models.Index(fields=['created_at', 'id'], name='order_created_id_idx'),
+        ]
     
     def __str__(self):
         return f"{self.order_number} - {self.user.email}"
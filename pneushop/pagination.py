@@ -0,0 +1,120 @@
+import json
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination, _reverse_ordering
+
+
+class KeysetPagination(CursorPagination):
+    """Cursor pagination on the view's active ordering, with the primary key as tie-breaker.
+
+    The cursor holds the values of every ordering column of the last row, and
+    the next page is `WHERE field >= last_field AND (field > last_field OR
+    id > last_id) ... LIMIT n`: a range scan of the composite (field, id)
+    index, with no COUNT(*) and no OFFSET, so the cost stays constant however
+    deep the client pages. Positions are unique, so cursors never need
+    CursorPagination's offsets. Ordering columns must not be nullable.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        # The view's ordering filter has already run: its ordering (e.g. -search_rank first for
+        # full-text results) is the queryset's, a fresh filter instance would not know it
+        ordering = [field for field in queryset.query.order_by if isinstance(field, str)]
+        if not ordering and any(hasattr(backend, 'get_ordering') for backend in getattr(view, 'filter_backends', [])):
+            ordering = super().get_ordering(request, queryset, view)
+        ordering = ordering or queryset.model._meta.ordering or ['-pk']
+        ordering = [ordering] if isinstance(ordering, str) else list(ordering)
+
+        if not any(field.lstrip('-') in ('id', 'pk') for field in ordering):
+            ordering.append('-id' if ordering[0].startswith('-') else 'id')
+        return tuple(ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        offset, reverse, current_position = self.cursor or (0, False, None)
+
+        ordering = _reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if current_position is not None:
+            queryset = queryset.filter(self.after_position(ordering, current_position))
+
+        # One more row tells whether there is a following page
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_following_position = len(results) > len(self.page)
+        following_position = self._get_position_from_instance(results[-1], self.ordering) \
+            if has_following_position else None
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = current_position is not None or offset > 0
+            self.has_previous = has_following_position
+            self.next_position = current_position
+            self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = current_position is not None or offset > 0
+            self.next_position = following_position
+            self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def after_position(self, ordering, position):
+        """Rows following `position` in `ordering`, as a lexicographic (field, ..., id) comparison"""
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        fields = [(field.lstrip('-'), 'lt' if field.startswith('-') else 'gt') for field in ordering]
+        condition = Q()
+        equal = Q()
+        for (field, lookup), value in zip(fields, values):
+            condition |= equal & Q(**{f'{field}__{lookup}': value})
+            equal &= Q(**{field: value})
+        # The bound on the leading column lets the database start the index scan at the position
+        field, lookup = fields[0]
+        return Q(**{f'{field}__{lookup}e': values[0]}) & condition
+
+    def _get_position_from_instance(self, instance, ordering):
+        names = [field.lstrip('-') for field in ordering]
+        if isinstance(instance, dict):
+            values = [instance[name] for name in names]
+        else:
+            values = [getattr(instance, name) for name in names]
+        return json.dumps([str(value) for value in values])
+
+
+class OptionalCursorPagination(PageNumberPagination):
+    """Page numbers by default; keyset pagination on request.
+
+    Clients opt in with ?pagination=cursor, then follow the `next`/`previous`
+    links (which carry a ?cursor= token). Cursor pages have no `count`.
+    """
+    mode_param = 'pagination'
+
+    def use_cursor(self, request):
+        return request.query_params.get(self.mode_param) == 'cursor' or 'cursor' in request.query_params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.use_cursor(request):
+            self.keyset = KeysetPagination()
+            self.keyset.page_size = self.get_page_size(request)
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -40,6 +40,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework_simplejwt',
     'rest_framework.authtoken',
@@ -183,10 +184,55 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    # Page numbers by default, ?pagination=cursor for keyset pagination
+    'DEFAULT_PAGINATION_CLASS': 'pneushop.pagination.OptionalCursorPagination',
     'PAGE_SIZE': 20
 }
 
+# Product search: 'basic' (ILIKE over name/brand/description/size) or
+# 'fulltext' (weighted PostgreSQL tsvector, see products/search.py)
+PRODUCT_SEARCH_MODE = config('PRODUCT_SEARCH_MODE', default='basic')
+
+# How often each worker checks whether its autocomplete index is stale
+PRODUCT_AUTOCOMPLETE_REFRESH_SECONDS = 30
+
+# Catalog caches are keyed on products.CatalogVersion; each worker re-reads it
+# at most every CATALOG_VERSION_TTL seconds
+CATALOG_VERSION_TTL = 2
+
+# Width of the price facet buckets (TND)
+PRODUCT_FACET_PRICE_BUCKET = 100
+
+# Equivalent tyre sizes: max rolling diameter difference, in percent
+PRODUCT_EQUIVALENT_SIZE_TOLERANCE = 3.0
+
+# Anonymous catalog responses (products/response_cache.py), in seconds; 0 disables
+PRODUCT_RESPONSE_CACHE_TIMEOUT = config('PRODUCT_RESPONSE_CACHE_TIMEOUT', default=300, cast=int)
+
+# Render the product list from .values() rows (products/fast_serialization.py)
+# instead of ProductSerializer; same JSON output
+PRODUCT_LIST_FAST_SERIALIZATION = config('PRODUCT_LIST_FAST_SERIALIZATION', default=True, cast=bool)
+
+# Filter/count/order the product list in a per-worker NumPy bitmap index
+# (products/bitmap_index.py) instead of SQL
+PRODUCT_BITMAP_INDEX = config('PRODUCT_BITMAP_INDEX', default=False, cast=bool)
+
+# Excel imports run as background jobs (products/import_jobs.py); uploaded
+# files wait here until their job finishes
+IMPORT_JOBS_DIR = config('IMPORT_JOBS_DIR', default=os.path.join(BASE_DIR, 'import_jobs'))
+# A running job without progress for this long is considered dead and requeued
+IMPORT_JOB_STALE_SECONDS = config('IMPORT_JOB_STALE_SECONDS', default=300, cast=int)
+# Chunked uploads of large workbooks (products/import_uploads.py): largest file,
+# largest chunk per PUT, and hours before an unfinished upload is discarded
+IMPORT_UPLOAD_MAX_SIZE = config('IMPORT_UPLOAD_MAX_SIZE', default=500 * 1024 * 1024, cast=int)
+IMPORT_UPLOAD_CHUNK_SIZE = config('IMPORT_UPLOAD_CHUNK_SIZE', default=8 * 1024 * 1024, cast=int)
+IMPORT_UPLOAD_EXPIRY_HOURS = config('IMPORT_UPLOAD_EXPIRY_HOURS', default=24, cast=int)
+
+# Uploader of the images embedded in imported workbooks (products/image_uploads.py);
+# 'products.image_uploads.local_upload' stores them under MEDIA_ROOT instead of Cloudinary
+PRODUCT_IMAGE_UPLOADER = config('PRODUCT_IMAGE_UPLOADER', default='products.image_uploads.cloudinary_upload')
+IMPORT_IMAGE_UPLOAD_WORKERS = config('IMPORT_IMAGE_UPLOAD_WORKERS', default=8, cast=int)
+
 # JWT Configuration
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import Category, Product, Order, OrderItem
+from .models import Category, Product, Order, OrderItem, VehicleFitment, ImportJob, ImportUpload, ImportedImage
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
@@ -64,6 +64,37 @@ class ProductAdmin(admin.ModelAdmin):
         super().save_model(request, obj, form, change)
 
 
+@admin.register(VehicleFitment)
+class VehicleFitmentAdmin(admin.ModelAdmin):
+    list_display = ('make', 'model', 'variant', 'year_start', 'year_end', 'axle', 'width', 'aspect_ratio', 'rim_diameter', 'load_index', 'speed_rating')
+    list_filter = ('make', 'axle')
+    search_fields = ('make', 'model', 'variant')
+
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'original_name', 'kind', 'status', 'progress', 'created_count', 'error_count', 'created_at', 'finished_at')
+    list_filter = ('status', 'kind', 'created_at')
+    search_fields = ('original_name',)
+    readonly_fields = ('created_at', 'started_at', 'finished_at', 'heartbeat_at')
+    exclude = ('row_images',)
+
+
+@admin.register(ImportUpload)
+class ImportUploadAdmin(admin.ModelAdmin):
+    list_display = ('original_name', 'kind', 'status', 'received', 'size', 'job', 'created_at', 'updated_at')
+    list_filter = ('status', 'kind', 'created_at')
+    search_fields = ('original_name', 'token')
+    readonly_fields = ('token', 'created_at', 'updated_at')
+
+
+@admin.register(ImportedImage)
+class ImportedImageAdmin(admin.ModelAdmin):
+    list_display = ('content_hash', 'url', 'created_at')
+    search_fields = ('content_hash', 'url')
+    readonly_fields = ('created_at',)
+
+
 class OrderItemInline(admin.TabularInline):
     model = OrderItem
     extra = 0
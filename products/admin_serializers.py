@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import Product, Category, StockMovement
+from .catalog import category_product_counts
 
 class AdminCategorySerializer(serializers.ModelSerializer):
     product_count = serializers.SerializerMethodField()
@@ -9,7 +10,10 @@ class AdminCategorySerializer(serializers.ModelSerializer):
         fields = '__all__'
 
     def get_product_count(self, obj):
-        return obj.products.count()
+        # AdminCategoryListCreateView annotates the count; otherwise use the cached counts
+        if hasattr(obj, 'product_count'):
+            return obj.product_count
+        return category_product_counts(active_only=False).get(obj.id, 0)
 
 class AdminProductSerializer(serializers.ModelSerializer):
     category_name = serializers.CharField(source='category.name', read_only=True)
@@ -19,7 +23,7 @@ class AdminProductSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Product
-        fields = '__all__'
+        exclude = ('search_vector',)
 
     def get_season_display(self, obj):
         return obj.get_season_display()
@@ -29,7 +33,7 @@ class AdminProductCreateUpdateSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Product
-        fields = '__all__'
+        exclude = ('search_vector',)
 
     def validate_price(self, value):
         if value <= 0:
@@ -19,11 +19,15 @@ from .models import Product, Category, StockMovement, OrderItem, Order
 from .admin_serializers import AdminProductSerializer, AdminCategorySerializer, AdminProductCreateUpdateSerializer, StockMovementSerializer
 from accounts.models import CustomUser
 from .permissions import IsAdminOrPurchasing
+from .search import ProductSearchFilter, RankedOrderingFilter, SEARCH_FIELDS, refresh_search_vectors
+from .catalog import bump_catalog_version
+from .response_cache import response_cache_stats
+from .upsert import normalize_name
 class AdminProductListCreateView(generics.ListCreateAPIView):
     """Admin view for listing and creating products"""
     queryset = Product.objects.all().select_related('category')
     permission_classes = [IsAdminOrPurchasing]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, ProductSearchFilter, RankedOrderingFilter]
     filterset_fields = ['category', 'brand', 'season', 'is_featured', 'is_active']
     search_fields = ['name', 'brand', 'description', 'size']
     ordering_fields = ['price', 'created_at', 'name', 'stock']
@@ -205,7 +209,13 @@ def bulk_update_products(request):
     
     try:
         products = Product.objects.filter(id__in=product_ids)
-        count = products.update(**updates)
+        # update() skips auto_now; incremental caches sync on updated_at
+        if 'name' in updates:
+            updates = {**updates, 'name_key': normalize_name(updates['name'])}
+        count = products.update(**{**updates, 'updated_at': timezone.now()})
+        if set(updates) & set(SEARCH_FIELDS):
+            refresh_search_vectors(products)
+        bump_catalog_version()  # queryset.update() does not send post_save
         
         return Response({
             'message': f'{count} produits mis à jour avec succès',
@@ -419,6 +429,7 @@ def debug_database_stats(request):
         'total_products': total_products,
         'recent_orders': list(recent_orders),
         'recent_items': list(recent_items),
+        'catalog_response_cache': response_cache_stats(),
     }
 
     return Response(debug_data)
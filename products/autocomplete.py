@@ -0,0 +1,177 @@
+"""
+In-memory autocomplete index for product_search_suggestions.
+
+Each worker keeps a sorted array of normalized keys (brands, product names,
+references and tyre sizes) and answers prefix queries with bisect, without
+touching the database. Suggestions are ranked by popularity: number of active
+products carrying the label plus units sold in orders.OrderItem.
+
+The index is rebuilt in a background thread when Product.updated_at (or the
+product count) advances; the check runs at most every
+PRODUCT_AUTOCOMPLETE_REFRESH_SECONDS.
+"""
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, Max, Sum
+
+from .tyre_size import format_tyre_size
+
+# Prefixes up to this length match a large part of the index: their top
+# results are precomputed instead of walking the range on every keystroke.
+SHORT_PREFIX_LENGTH = 3
+TOP_SUGGESTIONS = 10
+
+_NON_ALNUM_RE = re.compile(r'[^0-9a-z]+')
+
+
+def normalize(text):
+    """Lowercase, drop accents, spaces and punctuation: '205/55 R16' -> '20555r16'"""
+    text = unicodedata.normalize('NFKD', str(text)).encode('ascii', 'ignore').decode('ascii')
+    return _NON_ALNUM_RE.sub('', text.lower())
+
+
+class AutocompleteIndex:
+    def __init__(self, weighted_labels, stamp=None):
+        """`weighted_labels` maps a display label to (weight, [keys])"""
+        self.stamp = stamp
+        pairs = []
+        for label, (weight, keys) in weighted_labels.items():
+            for key in set(keys):
+                if key:
+                    pairs.append((key, -weight, label))
+        pairs.sort()
+        self._keys = [key for key, _, _ in pairs]
+        self._entries = [(-neg_weight, label) for _, neg_weight, label in pairs]
+        self._top_short = self._build_short_prefixes()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _build_short_prefixes(self):
+        best = defaultdict(dict)
+        for key, (weight, label) in zip(self._keys, self._entries):
+            for length in range(1, min(len(key), SHORT_PREFIX_LENGTH) + 1):
+                labels = best[key[:length]]
+                if weight > labels.get(label, -1):
+                    labels[label] = weight
+        return {
+            prefix: self._rank(labels.items(), TOP_SUGGESTIONS)
+            for prefix, labels in best.items()
+        }
+
+    @staticmethod
+    def _rank(weighted, limit):
+        ranked = sorted(weighted, key=lambda item: (-item[1], item[0]))
+        return [label for label, _ in ranked[:limit]]
+
+    def search(self, query, limit=TOP_SUGGESTIONS):
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        if len(prefix) <= SHORT_PREFIX_LENGTH and limit <= TOP_SUGGESTIONS:
+            return self._top_short.get(prefix, [])[:limit]
+
+        matches = {}
+        position = bisect_left(self._keys, prefix)
+        while position < len(self._keys) and self._keys[position].startswith(prefix):
+            weight, label = self._entries[position]
+            if weight > matches.get(label, -1):
+                matches[label] = weight
+            position += 1
+        return self._rank(matches.items(), limit)
+
+
+def catalog_stamp():
+    """Cheap fingerprint of the product table: (last update, row count)"""
+    from .models import Product
+
+    stamp = Product.objects.aggregate(last=Max('updated_at'), total=Count('id'))
+    return stamp['last'], stamp['total']
+
+
+def build_index():
+    from orders.models import OrderItem
+    from .models import Product
+
+    stamp = catalog_stamp()
+
+    sold = defaultdict(int)
+    for product_id, quantity in (
+        OrderItem.objects.exclude(product_id__isnull=True).exclude(product_id='')
+        .values_list('product_id').annotate(total=Sum('quantity'))
+    ):
+        sold[str(product_id)] += quantity or 0
+
+    weighted = {}
+
+    def add(label, popularity, *keys):
+        label = str(label).strip()
+        if not label:
+            return
+        weight, label_keys = weighted.get(label, (0, []))
+        label_keys.extend(keys)
+        weighted[label] = (weight + popularity, label_keys)
+
+    rows = Product.objects.filter(is_active=True).values_list(
+        'id', 'brand', 'name', 'reference', 'width', 'aspect_ratio', 'rim_diameter', 'construction'
+    )
+    for product_id, brand, name, reference, width, aspect_ratio, rim_diameter, construction in rows:
+        popularity = 1 + sold.get(str(product_id), 0)
+        if brand:
+            add(brand, popularity, normalize(brand))
+        if name:
+            # One key per word so "contact" finds "PNEU CONTINENTAL ... ULTRA CONTACT"
+            words = name.split()
+            add(name, popularity, *(normalize(' '.join(words[i:])) for i in range(len(words))))
+        if reference:
+            add(reference, popularity, normalize(reference))
+        if width and aspect_ratio and rim_diameter:
+            size = format_tyre_size(width, aspect_ratio, rim_diameter, construction)
+            # Sizes are often typed as bare digits: "2055516" -> 205/55R16
+            add(size, popularity, normalize(size), f"{width}{aspect_ratio}{rim_diameter}")
+
+    return AutocompleteIndex(weighted, stamp=stamp)
+
+
+_index = None
+_checked_at = 0.0
+_lock = threading.Lock()
+_refreshing = threading.Event()
+
+
+def _refresh_in_background():
+    global _index
+    try:
+        if catalog_stamp() != _index.stamp:
+            _index = build_index()
+    except Exception as e:
+        print(f"⚠️ Autocomplete index refresh failed: {e}")
+    finally:
+        _refreshing.clear()
+        connection.close()
+
+
+def get_index():
+    """Return this worker's index, building it on first use"""
+    global _index, _checked_at
+
+    if _index is None:
+        with _lock:
+            if _index is None:
+                _index = build_index()
+                _checked_at = time.monotonic()
+        return _index
+
+    interval = getattr(settings, 'PRODUCT_AUTOCOMPLETE_REFRESH_SECONDS', 30)
+    if time.monotonic() - _checked_at > interval and not _refreshing.is_set():
+        _refreshing.set()
+        _checked_at = time.monotonic()
+        threading.Thread(target=_refresh_in_background, daemon=True).start()
+    return _index
@@ -0,0 +1,267 @@
+"""
+In-memory bitmap index over active products for ProductListView.
+
+Catalog filters are low-cardinality (brand, season, category, featured, on
+sale, width, height, rim diameter, in stock), so each worker can keep one
+NumPy boolean array per facet value, aligned on a row array of product ids.
+A filter set becomes a few vectorized AND/OR operations; price ranges use
+a sorted price array (searchsorted), and the orderings the list offers
+(price, created_at) are precomputed permutations. Only the ids of the
+requested page are then fetched from the database.
+
+The index follows the catalog version: when it changes, rows with a newer
+updated_at are patched in place; deleted products (or too many changes)
+trigger a full rebuild. Requests using parameters the index does not cover
+(search, load index, cursor pagination...) return None and go through SQL.
+
+Enabled with PRODUCT_BITMAP_INDEX = True.
+"""
+import threading
+from datetime import timedelta
+from decimal import ROUND_CEILING, ROUND_FLOOR, Decimal, InvalidOperation
+
+import numpy as np
+from django.conf import settings
+
+from .catalog import get_catalog_version
+
+# Query param -> facet column, for single-value equality filters
+FACET_PARAMS = {
+    'brand': 'brand',
+    'season': 'season',
+    'category': 'category_id',
+    'is_featured': 'is_featured',
+    'on_sale': 'on_sale',
+    'in_stock': 'in_stock',
+    'width': 'width',
+    'height': 'aspect_ratio',
+    'diameter': 'rim_diameter',
+}
+FACET_COLUMNS = tuple(FACET_PARAMS.values())
+
+# Params that do not change the result set
+NEUTRAL_PARAMS = {'page', 'page_size', 'fields', 'view', 'format', 'min_price', 'max_price', 'ordering', 'category_slug'}
+
+ROW_FIELDS = (
+    'id', 'brand', 'season', 'category_id', 'is_featured', 'old_price', 'price',
+    'stock', 'width', 'aspect_ratio', 'rim_diameter', 'created_at', 'updated_at', 'is_active',
+)
+
+# Above this share of changed rows, rebuild instead of patching
+REBUILD_RATIO = 0.2
+
+_UNSET = object()
+
+TRUE_VALUES = {'true', 'True', '1'}
+FALSE_VALUES = {'false', 'False', '0'}
+
+
+def _seasons():
+    from .models import Product
+
+    return {value for value, label in Product._meta.get_field('season').choices}
+
+
+def bitmap_index_enabled():
+    return getattr(settings, 'PRODUCT_BITMAP_INDEX', False)
+
+
+def _cents(value, rounding):
+    return int((Decimal(value) * 100).to_integral_value(rounding=rounding))
+
+
+def _facet_values(row):
+    """Facet column -> value for a ROW_FIELDS dict"""
+    old_price, price = row['old_price'], row['price']
+    return {
+        'brand': row['brand'],
+        'season': row['season'],
+        'category_id': row['category_id'],
+        'is_featured': row['is_featured'],
+        # Same conditions as ProductListView's on_sale / in_stock filters
+        'on_sale': bool(old_price is not None and old_price > 0),
+        'in_stock': row['stock'] > 0,
+        'width': row['width'],
+        'aspect_ratio': row['aspect_ratio'],
+        'rim_diameter': row['rim_diameter'],
+    }
+
+
+class BitmapIndex:
+    def __init__(self, rows, version):
+        rows = [row for row in rows if row['is_active']]
+        size = len(rows)
+        self.version = version
+        self.ids = np.fromiter((row['id'] for row in rows), dtype=np.int64, count=size)
+        self.position = {int(pk): i for i, pk in enumerate(self.ids)}
+        self.alive = np.ones(size, dtype=bool)
+        self.prices = np.fromiter((_cents(row['price'], ROUND_FLOOR) for row in rows), dtype=np.int64, count=size)
+        self.created = np.fromiter((row['created_at'].timestamp() for row in rows), dtype=np.float64, count=size)
+        self.values = {column: [_UNSET] * size for column in FACET_COLUMNS}
+        self.bitmaps = {column: {} for column in FACET_COLUMNS}
+        for i, row in enumerate(rows):
+            self._set_values(i, _facet_values(row))
+        self.synced_at = max((row['updated_at'] for row in rows), default=None)
+        self._sort()
+
+    def __len__(self):
+        return int(self.alive.sum())
+
+    def _bitmap(self, column, value):
+        bitmap = self.bitmaps[column].get(value)
+        if bitmap is None:
+            bitmap = self.bitmaps[column][value] = np.zeros(len(self.ids), dtype=bool)
+        return bitmap
+
+    def _set_values(self, i, values):
+        for column, value in values.items():
+            old = self.values[column][i]
+            if old is not _UNSET:
+                self.bitmaps[column][old][i] = False
+            self.values[column][i] = value
+            self._bitmap(column, value)[i] = True
+
+    def _sort(self):
+        # Row permutations per ordering, ties broken by id
+        self.orderings = {
+            'price': np.lexsort((self.ids, self.prices)),
+            '-price': np.lexsort((self.ids, -self.prices)),
+            'created_at': np.lexsort((self.ids, self.created)),
+            '-created_at': np.lexsort((self.ids, -self.created)),
+        }
+        self.by_price = self.orderings['price']
+        self.sorted_prices = self.prices[self.by_price]
+
+    def _grow(self, count):
+        self.ids = np.concatenate([self.ids, np.zeros(count, dtype=np.int64)])
+        self.alive = np.concatenate([self.alive, np.zeros(count, dtype=bool)])
+        self.prices = np.concatenate([self.prices, np.zeros(count, dtype=np.int64)])
+        self.created = np.concatenate([self.created, np.zeros(count, dtype=np.float64)])
+        for column in FACET_COLUMNS:
+            self.values[column].extend([_UNSET] * count)
+            for value, bitmap in self.bitmaps[column].items():
+                self.bitmaps[column][value] = np.concatenate([bitmap, np.zeros(count, dtype=bool)])
+
+    def apply(self, rows, version):
+        """Patch the index with changed rows (inserted, edited or deactivated products)"""
+        new_rows = [row for row in rows if row['id'] not in self.position and row['is_active']]
+        if new_rows:
+            start = len(self.ids)
+            self._grow(len(new_rows))
+            for offset, row in enumerate(new_rows):
+                self.position[row['id']] = start + offset
+                self.ids[start + offset] = row['id']
+
+        for row in rows:
+            i = self.position.get(row['id'])
+            if i is None:
+                continue
+            self.alive[i] = row['is_active']
+            self.prices[i] = _cents(row['price'], ROUND_FLOOR)
+            self.created[i] = row['created_at'].timestamp()
+            self._set_values(i, _facet_values(row))
+            if self.synced_at is None or row['updated_at'] > self.synced_at:
+                self.synced_at = row['updated_at']
+        self._sort()
+        self.version = version
+
+    def mask(self, params):
+        """Boolean row mask for the query params, or None if they are not all supported"""
+        if set(params) - set(FACET_PARAMS) - NEUTRAL_PARAMS:
+            return None
+        mask = self.alive.copy()
+
+        for param, column in FACET_PARAMS.items():
+            raw = params.get(param)
+            if not raw:
+                continue
+            if column == 'is_featured':
+                if raw not in TRUE_VALUES | FALSE_VALUES:
+                    continue  # django-filter ignores invalid booleans
+                value = raw in TRUE_VALUES
+            elif column in ('on_sale', 'in_stock'):
+                if raw != 'true':
+                    continue
+                value = True
+            elif column in ('category_id', 'width', 'aspect_ratio', 'rim_diameter'):
+                if not raw.strip().isdigit():
+                    if column == 'category_id':
+                        return None  # let the SQL path report it
+                    return np.zeros_like(mask)
+                value = int(raw)
+            elif column == 'season' and raw not in _seasons():
+                return None  # django-filter rejects unknown choices
+            else:
+                value = raw
+            bitmap = self.bitmaps[column].get(value)
+            if bitmap is None:
+                return np.zeros_like(mask)
+            mask &= bitmap
+
+        category_slug = params.get('category_slug')
+        if category_slug:
+            from .facets import load_categories
+
+            selected = np.zeros_like(mask)
+            for pk, category in load_categories().items():
+                if category['slug'] == category_slug and pk in self.bitmaps['category_id']:
+                    selected |= self.bitmaps['category_id'][pk]
+            mask &= selected
+
+        try:
+            min_price, max_price = params.get('min_price'), params.get('max_price')
+            lo = np.searchsorted(self.sorted_prices, _cents(min_price, ROUND_CEILING), 'left') if min_price else 0
+            hi = np.searchsorted(self.sorted_prices, _cents(max_price, ROUND_FLOOR), 'right') if max_price else len(self.ids)
+        except (InvalidOperation, ValueError):
+            return None
+        if min_price or max_price:
+            in_range = np.zeros_like(mask)
+            in_range[self.by_price[lo:hi]] = True
+            mask &= in_range
+        return mask
+
+    def query(self, params):
+        """Product ids matching `params` in the requested order, or None to fall back to SQL"""
+        ordering = params.get('ordering') or '-created_at'
+        if ordering not in self.orderings:
+            return None
+        mask = self.mask(params)
+        if mask is None:
+            return None
+        order = self.orderings[ordering]
+        return self.ids[order[mask[order]]]
+
+
+_index = None
+_lock = threading.Lock()
+
+
+def _load_rows(queryset):
+    return list(queryset.values(*ROW_FIELDS).order_by('id'))
+
+
+def get_bitmap_index():
+    """This worker's index, built on first use and patched when the catalog version moves"""
+    from .models import Product
+
+    global _index
+    version = get_catalog_version()
+    if _index is not None and _index.version == version:
+        return _index
+
+    with _lock:
+        if _index is None:
+            _index = BitmapIndex(_load_rows(Product.objects.all()), version)
+        elif _index.version != version:
+            # Small overlap: rows saved in the same instant as the last sync
+            since = _index.synced_at - timedelta(seconds=1) if _index.synced_at else None
+            changed = _load_rows(Product.objects.filter(updated_at__gte=since)) if since else []
+            active = Product.objects.filter(is_active=True).count()
+            if len(changed) > REBUILD_RATIO * max(len(_index), 1):
+                _index = BitmapIndex(_load_rows(Product.objects.all()), version)
+            else:
+                _index.apply(changed, version)
+                if len(_index) != active:
+                    # Deleted products leave no updated_at trace
+                    _index = BitmapIndex(_load_rows(Product.objects.all()), version)
+    return _index
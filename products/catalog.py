@@ -0,0 +1,90 @@
+"""
+Catalog version number shared by all workers, and small catalog aggregates
+cached on it.
+
+Anything cached from the product catalog is keyed on get_catalog_version().
+Product/Category signals bump it (see products/signals.py); code paths that
+bypass signals (queryset.update(), bulk_create()) call bump_catalog_version()
+themselves. Long batches can wrap their writes in deferred_catalog_bump() so
+they bump once at the end instead of once per row.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+_local = threading.local()
+_memo = {'version': None, 'updated_at': None, 'fetched_at': 0.0}
+
+
+def get_catalog_state():
+    """(version, last change time), re-read from the database at most every CATALOG_VERSION_TTL seconds"""
+    from .models import CatalogVersion
+
+    ttl = getattr(settings, 'CATALOG_VERSION_TTL', 2)
+    now = time.monotonic()
+    if _memo['version'] is None or now - _memo['fetched_at'] > ttl:
+        row, _ = CatalogVersion.objects.get_or_create(pk=1)
+        _memo['version'] = row.version
+        _memo['updated_at'] = row.updated_at
+        _memo['fetched_at'] = now
+    return _memo['version'], _memo['updated_at']
+
+
+def get_catalog_version():
+    return get_catalog_state()[0]
+
+
+def _bump():
+    from .models import CatalogVersion
+
+    updated = CatalogVersion.objects.filter(pk=1).update(version=F('version') + 1, updated_at=timezone.now())
+    if not updated:
+        CatalogVersion.objects.get_or_create(pk=1, defaults={'version': 2})
+    _memo['version'] = None
+
+
+def bump_catalog_version():
+    """Invalidate catalog caches once the current transaction commits"""
+    if getattr(_local, 'deferred', 0):
+        _local.pending = True
+        return
+    transaction.on_commit(_bump)
+
+
+def in_catalog_batch():
+    """True inside deferred_catalog_bump(): per-row maintenance can wait for the batch jobs"""
+    return bool(getattr(_local, 'deferred', 0))
+
+
+@contextmanager
+def deferred_catalog_bump():
+    """Collapse every bump issued inside the block into a single one"""
+    _local.deferred = getattr(_local, 'deferred', 0) + 1
+    try:
+        yield
+    finally:
+        _local.deferred -= 1
+        if not _local.deferred and getattr(_local, 'pending', False):
+            _local.pending = False
+            transaction.on_commit(_bump)
+
+
+def category_product_counts(active_only=True):
+    """category id -> number of products, one GROUP BY per catalog version"""
+    from .models import Category
+
+    key = f"category_product_counts:{get_catalog_version()}:{int(active_only)}"
+    counts = cache.get(key)
+    if counts is None:
+        product_filter = Q(products__is_active=True) if active_only else None
+        counts = dict(
+            Category.objects.annotate(n=Count('products', filter=product_filter)).values_list('id', 'n')
+        )
+        cache.set(key, counts, 60 * 60)
+    return counts
@@ -0,0 +1,69 @@
+"""
+Equivalent (plus/minus) tyre sizes.
+
+Two sizes are interchangeable when their rolling diameters are close: the
+speedometer and ABS see the same wheel circumference. Product.overall_diameter
+is precomputed on save (products/tyre_size.py) and indexed, so a lookup is a
+range scan on that column instead of parsing Product.size strings.
+
+Replacements must also carry at least the requested load index and speed
+rating; products whose load/speed are unknown are left out when the request
+specifies them.
+"""
+from django.conf import settings
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Abs
+
+from .tyre_size import format_tyre_size, parse_tyre_size, speed_ratings_from
+
+EQUIVALENT_SIZES_LIMIT = 50
+
+
+def default_tolerance():
+    """Allowed rolling diameter difference, in percent"""
+    return float(getattr(settings, 'PRODUCT_EQUIVALENT_SIZE_TOLERANCE', 3.0))
+
+
+def equivalent_products(size, tolerance=None, in_stock=True, limit=EQUIVALENT_SIZES_LIMIT):
+    """(parsed size, queryset) of active products replacing `size`, closest diameter first.
+
+    Raises ValueError when `size` is not a tyre size.
+    """
+    from .models import Product
+
+    parsed = parse_tyre_size(size)
+    if parsed['overall_diameter'] is None:
+        raise ValueError(f"Taille de pneu invalide: {size}")
+    tolerance = default_tolerance() if tolerance is None else tolerance
+    target = parsed['overall_diameter']
+    margin = target * tolerance / 100
+
+    queryset = Product.objects.filter(
+        is_active=True,
+        overall_diameter__gte=target - margin,
+        overall_diameter__lte=target + margin,
+    )
+    if in_stock:
+        queryset = queryset.filter(stock__gt=0)
+    if parsed['load_index'] is not None:
+        queryset = queryset.filter(load_index__gte=parsed['load_index'])
+    speed_ratings = speed_ratings_from(parsed['speed_rating'])
+    if speed_ratings:
+        queryset = queryset.filter(speed_rating__in=speed_ratings)
+
+    queryset = queryset.annotate(
+        diameter_gap=Abs(F('overall_diameter') - Value(target, output_field=FloatField()))
+    ).order_by('diameter_gap', 'price', 'id')
+    return parsed, queryset[:limit]
+
+
+def describe_size(parsed):
+    """Canonical size label with load/speed, e.g. 205/55R16 91V"""
+    label = format_tyre_size(parsed['width'], parsed['aspect_ratio'], parsed['rim_diameter'], parsed['construction'])
+    if parsed['load_index'] is not None:
+        label += f" {parsed['load_index']}{parsed['speed_rating']}"
+    return label
+
+
+def difference_percent(diameter, target):
+    return round((diameter - target) / target * 100, 2)
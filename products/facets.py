@@ -0,0 +1,189 @@
+"""
+Facet counts for the catalog filters.
+
+Active products are grouped once per catalog version on the facet columns
+(brand, season, category, rim diameter, width, price bucket) into a small
+aggregate table kept in the cache. Counts for the current filter set are then
+computed in Python from those groups, without touching the database.
+
+Counting is disjunctive: the counts of a facet apply every selected filter
+except that facet's own, so the frontend can still offer the other values
+("Michelin (42)" next to the selected "Continental").
+"""
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, DecimalField, F, Max, Min, Value
+from django.db.models.functions import Floor
+
+from .catalog import get_catalog_version
+
+FACETS = ('brand', 'season', 'category', 'rim_diameter', 'width', 'price_bucket')
+
+# Query params -> facet, as accepted by ProductListView
+FACET_PARAMS = {
+    'brand': 'brand',
+    'season': 'season',
+    'category': 'category',
+    'diameter': 'rim_diameter',
+    'width': 'width',
+    'price_bucket': 'price_bucket',
+}
+
+FACETS_CACHE_TIMEOUT = 60 * 60
+
+
+def price_bucket_size():
+    return Decimal(str(getattr(settings, 'PRODUCT_FACET_PRICE_BUCKET', 100)))
+
+
+def _decimal_or_none(value):
+    try:
+        return Decimal(str(value)) if value not in (None, '') else None
+    except InvalidOperation:
+        return None
+
+
+def load_facet_groups(min_price=None, max_price=None, on_sale=False):
+    """Aggregate table of active products grouped on every facet column (cached per catalog version)"""
+    from .models import Product
+
+    key = f"product_facets:{get_catalog_version()}:{min_price}:{max_price}:{int(on_sale)}"
+    groups = cache.get(key)
+    if groups is not None:
+        return groups
+
+    queryset = Product.objects.filter(is_active=True)
+    if min_price is not None:
+        queryset = queryset.filter(price__gte=min_price)
+    if max_price is not None:
+        queryset = queryset.filter(price__lte=max_price)
+    if on_sale:
+        queryset = queryset.filter(old_price__isnull=False, old_price__gt=0)
+
+    bucket = Value(price_bucket_size(), output_field=DecimalField(max_digits=10, decimal_places=2))
+    rows = queryset.values(
+        'brand', 'season', 'rim_diameter', 'width', 'category_id',
+        price_bucket=Floor(F('price') / bucket),
+    ).annotate(count=Count('id'), min_price=Min('price'), max_price=Max('price')).order_by()
+
+    groups = []
+    for row in rows:
+        row['category'] = row.pop('category_id')
+        row['price_bucket'] = int(row['price_bucket']) if row['price_bucket'] is not None else None
+        groups.append(row)
+    cache.set(key, groups, FACETS_CACHE_TIMEOUT)
+    return groups
+
+
+def load_categories():
+    """id -> {id, name, slug} for every category (cached per catalog version)"""
+    from .models import Category
+
+    key = f"product_facet_categories:{get_catalog_version()}"
+    categories = cache.get(key)
+    if categories is None:
+        categories = {category['id']: category for category in Category.objects.values('id', 'name', 'slug')}
+        cache.set(key, categories, FACETS_CACHE_TIMEOUT)
+    return categories
+
+
+def parse_facet_filters(params):
+    """Selected values per facet from query params; comma separated values are OR'ed"""
+    selected = {}
+    for param, facet in FACET_PARAMS.items():
+        raw = params.get(param)
+        if not raw:
+            continue
+        values = [value.strip() for value in str(raw).split(',') if value.strip()]
+        if facet in ('category', 'rim_diameter', 'width', 'price_bucket'):
+            values = [int(value) for value in values if value.lstrip('-').isdigit()]
+        selected[facet] = set(values)
+
+    category_slug = params.get('category_slug')
+    if category_slug:
+        selected['category'] = {
+            category_id for category_id, category in load_categories().items()
+            if category['slug'] == category_slug
+        }
+    return selected
+
+
+def compute_facets(groups, selected):
+    """Per-value counts for every facet, plus total and price range of the full filter set"""
+    counts = {facet: {} for facet in FACETS}
+    total = 0
+    price_min = price_max = None
+
+    for group in groups:
+        failed = [facet for facet, values in selected.items() if group[facet] not in values]
+        if len(failed) > 1:
+            continue
+        if not failed:
+            total += group['count']
+            if price_min is None or group['min_price'] < price_min:
+                price_min = group['min_price']
+            if price_max is None or group['max_price'] > price_max:
+                price_max = group['max_price']
+        for facet in FACETS:
+            # A group only counts for a facet if it passes every *other* filter
+            if failed and failed[0] != facet:
+                continue
+            value = group[facet]
+            if value is None or value == '':
+                continue
+            counts[facet][value] = counts[facet].get(value, 0) + group['count']
+
+    return {
+        'total': total,
+        'price_range': {'min_price': price_min, 'max_price': price_max},
+        'counts': counts,
+    }
+
+
+def product_facets(params):
+    """Facet payload for product_filters, for the filter set in `params`"""
+    from .models import Product
+
+    groups = load_facet_groups(
+        min_price=_decimal_or_none(params.get('min_price')),
+        max_price=_decimal_or_none(params.get('max_price')),
+        on_sale=params.get('on_sale') == 'true',
+    )
+    result = compute_facets(groups, parse_facet_filters(params))
+    counts = result['counts']
+
+    season_labels = dict(Product._meta.get_field('season').choices)
+    categories = load_categories()
+    bucket = price_bucket_size()
+
+    def by_count(facet_counts):
+        return sorted(facet_counts.items(), key=lambda item: (-item[1], str(item[0])))
+
+    return {
+        'total': result['total'],
+        'filtered_price_range': result['price_range'],
+        'facets': {
+            'brand': [{'value': value, 'count': count} for value, count in by_count(counts['brand'])],
+            'season': [
+                {'value': value, 'label': season_labels.get(value, value), 'count': count}
+                for value, count in by_count(counts['season'])
+            ],
+            'category': [
+                {
+                    'value': value,
+                    'label': categories.get(value, {}).get('name'),
+                    'slug': categories.get(value, {}).get('slug'),
+                    'count': count,
+                }
+                for value, count in by_count(counts['category'])
+            ],
+            'rim_diameter': [{'value': v, 'count': c} for v, c in sorted(counts['rim_diameter'].items())],
+            'width': [{'value': v, 'count': c} for v, c in sorted(counts['width'].items())],
+            'price_bucket': [
+                {'value': v, 'min': v * bucket, 'max': (v + 1) * bucket, 'count': c}
+                for v, c in sorted(counts['price_bucket'].items())
+            ],
+        },
+    }
@@ -0,0 +1,122 @@
+"""
+values()-based rendering of ProductSerializer for the public product list.
+
+ProductSerializer builds a model instance per row, then walks its fields,
+SerializerMethodFields and model properties for each one. ProductRowRenderer
+does the introspection once: it reads the serializer's fields (including a
+?fields= / ?view=card selection), compiles one accessor per output field and
+then maps plain `.values()` dicts to the same JSON shape. Plain model fields
+keep the serializer field's formatting: its to_representation(), or an
+equivalent inlined accessor for strings, numbers and ISO datetimes.
+
+PRODUCT_LIST_FAST_SERIALIZATION = False falls back to the serializer.
+`python manage.py benchmark_product_list` checks parity and measures both.
+"""
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+from .models import Product
+from .serializers import CategorySummarySerializer, ProductSerializer
+
+SEASON_LABELS = dict(Product._meta.get_field('season').flatchoices)
+
+
+def fast_serialization_enabled():
+    return getattr(settings, 'PRODUCT_LIST_FAST_SERIALIZATION', True)
+
+
+def _is_on_sale(row):
+    # Same expression as Product.is_on_sale (may be None/Decimal, not only bool)
+    return row['old_price'] and row['old_price'] > row['price']
+
+
+def _discount_percentage(row):
+    if _is_on_sale(row):
+        return int(((row['old_price'] - row['price']) / row['old_price']) * 100)
+    return 0
+
+
+def _season_display(row):
+    return SEASON_LABELS.get(row['season'], row['season'])
+
+
+def _plain(name, field):
+    """Accessor for a model field, specialised for the common field types"""
+    if isinstance(field, (serializers.CharField, serializers.IntegerField, serializers.BooleanField)):
+        # Database values already have the output type (str(), int(), bool() would be no-ops)
+        return lambda row: row[name]
+
+    if isinstance(field, serializers.DateTimeField) and \
+            str(getattr(field, 'format', api_settings.DATETIME_FORMAT)).lower() == ISO_8601:
+        # DateTimeField.to_representation looks the timezone up on every call
+        tz = getattr(field, 'timezone', None) or field.default_timezone()
+
+        def accessor(row):
+            value = row[name]
+            if value is None:
+                return None
+            if tz is not None and timezone.is_aware(value):
+                value = value.astimezone(tz)
+            value = value.isoformat()
+            return value[:-6] + 'Z' if value.endswith('+00:00') else value
+        return accessor
+
+    def accessor(row):
+        value = row[name]
+        return None if value is None else field.to_representation(value)
+    return accessor
+
+
+def _nested_category(fields):
+    names = [(f'category__{name}', name, field) for name, field in fields.items()]
+
+    def accessor(row):
+        if row['category__id'] is None:
+            return None
+        return {
+            name: None if row[column] is None else field.to_representation(row[column])
+            for column, name, field in names
+        }
+    return accessor
+
+
+# Output fields computed from other columns: field -> (accessor, columns it reads)
+COMPUTED = {
+    'is_on_sale': (_is_on_sale, ('price', 'old_price')),
+    'discount_percentage': (_discount_percentage, ('price', 'old_price')),
+    'season_display': (_season_display, ('season',)),
+}
+
+
+class ProductRowRenderer:
+    """Precompiled ProductSerializer output for rows of Product.objects.values(*renderer.columns)"""
+
+    def __init__(self, fields=None, context=None, serializer_class=ProductSerializer):
+        serializer = serializer_class(fields=fields, context=context or {})
+        columns = {'id'}
+        self.accessors = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if name in COMPUTED:
+                accessor, reads = COMPUTED[name]
+                columns.update(reads)
+            elif isinstance(field, CategorySummarySerializer):
+                category_fields = field.fields
+                accessor = _nested_category(category_fields)
+                columns.update(f'category__{n}' for n in category_fields)
+                columns.add('category__id')
+            else:
+                accessor = _plain(field.source, field)
+                columns.add(field.source)
+            self.accessors.append((name, accessor))
+        self.columns = tuple(sorted(columns))
+
+    def render_row(self, row):
+        return {name: accessor(row) for name, accessor in self.accessors}
+
+    def render(self, rows):
+        accessors = self.accessors
+        return [{name: accessor(row) for name, accessor in accessors} for row in rows]
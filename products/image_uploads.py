@@ -0,0 +1,112 @@
+"""
+Image uploads for the Excel import.
+
+The same tyre photo is often embedded on dozens of rows of a price list, and
+the same list is imported again at every price update. Images are hashed
+(SHA-256 of their bytes) and uploaded once per distinct content: hashes
+already in products.ImportedImage reuse the stored URL, the others are
+uploaded concurrently through a bounded thread pool and recorded.
+
+The uploader is a function taking the image bytes and returning its URL,
+chosen with PRODUCT_IMAGE_UPLOADER (dotted path). cloudinary_upload is the
+default; local_upload stores files under MEDIA_ROOT for development and
+tests without Cloudinary credentials.
+"""
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import cloudinary.uploader
+from django.conf import settings
+from django.utils.module_loading import import_string
+from PIL import Image
+
+from .models import ImportedImage
+
+DEFAULT_UPLOADER = 'products.image_uploads.cloudinary_upload'
+
+
+def cloudinary_upload(data):
+    upload_result = cloudinary.uploader.upload(
+        BytesIO(data),
+        folder="pneushop/uploads/",
+        resource_type="image"
+    )
+    return upload_result.get("secure_url")
+
+
+def local_upload(data):
+    """Stand-in uploader: writes the image under MEDIA_ROOT/uploads/images, named by its hash"""
+    folder = os.path.join(settings.MEDIA_ROOT, 'uploads', 'images')
+    os.makedirs(folder, exist_ok=True)
+    try:
+        extension = Image.open(BytesIO(data)).format.lower()
+    except Exception:
+        extension = 'img'
+    name = f"{content_hash(data)}.{extension}"
+    with open(os.path.join(folder, name), 'wb') as destination:
+        destination.write(data)
+    return f"{settings.MEDIA_URL}uploads/images/{name}"
+
+
+def get_uploader():
+    return import_string(getattr(settings, 'PRODUCT_IMAGE_UPLOADER', DEFAULT_UPLOADER))
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _upload(uploader, image):
+    try:
+        return uploader(image.read())
+    except Exception as e:
+        print(f"⚠️ Image upload failed: {e}")
+        return None
+
+
+def upload_images(images, uploader=None, workers=None, progress=None):
+    """URL per image (None when its upload failed), uploading each distinct content once.
+
+    `images` are objects with a read() method (workbook.LazyImage). Only the
+    hashes are kept while scanning them, the bytes are read again by the
+    upload threads. `progress` (e.g. the import job heartbeat) is called after
+    each image hashed and each upload finished; if it raises, the uploads not
+    started yet are cancelled.
+    """
+    uploader = uploader or get_uploader()
+    workers = workers or getattr(settings, 'IMPORT_IMAGE_UPLOAD_WORKERS', 8)
+
+    hashes = []
+    first_image = {}
+    for image in images:
+        digest = content_hash(image.read())
+        hashes.append(digest)
+        first_image.setdefault(digest, image)
+        if progress is not None:
+            progress()
+
+    urls = dict(ImportedImage.objects.filter(content_hash__in=list(first_image)).values_list('content_hash', 'url'))
+    missing = [digest for digest in first_image if digest not in urls]
+    print(f"🖼️ {len(hashes)} images, {len(first_image)} distinct, {len(first_image) - len(missing)} already uploaded")
+
+    if missing:
+        new_urls = {}
+        executor = ThreadPoolExecutor(max_workers=workers)
+        try:
+            uploaded = executor.map(lambda digest: _upload(uploader, first_image[digest]), missing)
+            for digest, url in zip(missing, uploaded):
+                if url:
+                    new_urls[digest] = url
+                if progress is not None:
+                    progress()
+        finally:
+            executor.shutdown(cancel_futures=True)
+        ImportedImage.objects.bulk_create(
+            [ImportedImage(content_hash=digest, url=url) for digest, url in new_urls.items()],
+            ignore_conflicts=True,
+        )
+        urls.update(new_urls)
+
+    return [urls.get(digest) for digest in hashes]
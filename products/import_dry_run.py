@@ -0,0 +1,159 @@
+"""
+Dry run of the product imports (?dry_run=true on the import endpoints).
+
+The whole workbook is parsed and validated like the import would do it, the
+rows are matched against the catalog and the response says what the import
+would change, without writing anything: new products, price and stock
+changes, rows that are not products (no name or no price) and validation
+errors.
+
+Rows are matched like in upsert mode (products/upsert.py): by reference,
+then by normalized name. The candidates of a batch are loaded with one
+query and joined with the rows in memory. In create mode a matched row is
+reported as a duplicate, since the import would create a second product.
+Images are not extracted, so nothing is uploaded either.
+"""
+import pandas as pd
+
+from .importer import (
+    CategoryCache,
+    batch_attributes,
+    iter_batches,
+    open_import_workbook,
+    parse_fast_row,
+    parse_row,
+    row_product_name,
+    validate_import_columns,
+)
+from .models import Category
+from .upsert import ExistingProducts, changed_fields
+
+# Rows matched per catalog query
+DRY_RUN_BATCH_SIZE = 500
+# Entries returned per list of the diff (the summary has the full counts)
+DRY_RUN_LIST_LIMIT = 100
+
+
+class ImportDiff:
+    """What an import would do, row after row"""
+
+    def __init__(self, mode):
+        self.mode = mode
+        self.existing = ExistingProducts()
+        self.new_products = []
+        self.duplicates = []
+        # Existing product id -> change (a product on several rows keeps the last one)
+        self.price_changes = {}
+        self.stock_changes = {}
+        self.updated = {}
+        self.unchanged = set()
+        self.unmatched_rows = []
+        self.errors = []
+
+    def add_batch(self, parsed):
+        """Join the (index, product, base slug, fields) rows of a batch with the catalog"""
+        self.existing.load([product for index, product, base, fields in parsed])
+        for index, product, base, fields in parsed:
+            match = self.existing.find(product)
+            if match is None:
+                self._add_new(index, product)
+                self.existing.add(product)
+                continue
+            if match.pk is None:
+                continue  # repeated row of a product the import would create
+
+            if self.mode != 'upsert':
+                self._add_new(index, product)
+                self.duplicates.append({'row': index + 1, 'id': match.pk, 'name': match.name})
+                continue
+
+            differences = changed_fields(match, product, fields)
+            if not differences:
+                if match.pk not in self.updated:
+                    self.unchanged.add(match.pk)
+                continue
+            self.unchanged.discard(match.pk)
+            self.updated[match.pk] = differences
+            if 'price' in differences:
+                self.price_changes[match.pk] = {'row': index + 1, 'id': match.pk, 'name': match.name,
+                                                'old': str(match.price), 'new': str(product.price)}
+            if 'stock' in differences:
+                self.stock_changes[match.pk] = {'row': index + 1, 'id': match.pk, 'name': match.name,
+                                                'old': match.stock, 'new': product.stock}
+
+    def _add_new(self, index, product):
+        self.new_products.append({
+            'row': index + 1, 'name': product.name, 'price': str(product.price), 'stock': product.stock,
+        })
+
+    def skipped(self, index, has_name):
+        self.unmatched_rows.append({
+            'row': index + 1,
+            'reason': 'Missing price' if has_name else 'Missing product name',
+        })
+
+    def payload(self, kind, total_rows):
+        limit = DRY_RUN_LIST_LIMIT
+        return {
+            'message': '🔍 Dry run completed - nothing was written',
+            'summary': {
+                'total_rows': total_rows,
+                'kind': kind,
+                'mode': self.mode,
+                'new_products': len(self.new_products),
+                'duplicates': len(self.duplicates),
+                'updated': len(self.updated),
+                'price_changes': len(self.price_changes),
+                'stock_changes': len(self.stock_changes),
+                'unchanged': len(self.unchanged),
+                'unmatched_rows': len(self.unmatched_rows),
+                'errors': len(self.errors),
+                'images_processed': False,
+            },
+            'new_products': self.new_products[:limit],
+            'duplicates': self.duplicates[:limit],
+            'price_changes': list(self.price_changes.values())[:limit],
+            'stock_changes': list(self.stock_changes.values())[:limit],
+            'unmatched_rows': self.unmatched_rows[:limit],
+            'errors': self.errors[:limit],
+        }
+
+
+def dry_run_import(path, kind='full', mode='create'):
+    """Diff of the import of the workbook at `path`; raises ImportFileError like the import"""
+    diff = ImportDiff(mode)
+    with open_import_workbook(path, sheets=None if kind == 'full' else [0]) as reader:
+        total_rows = reader.count_rows()
+        validate_import_columns(reader, total_rows)
+
+        if kind == 'full':
+            categories = CategoryCache(create=False)
+        else:
+            category = Category.objects.filter(name='Continental').first() or Category(
+                name='Continental', slug='continental', description='Imported products',
+            )
+
+        for batch in iter_batches(reader.rows(), DRY_RUN_BATCH_SIZE):
+            parsed = []
+            if kind == 'full':
+                attributes = batch_attributes([row.values for row in batch])
+            for position, row in enumerate(batch):
+                errors_before = len(diff.errors)
+                if kind == 'full':
+                    result = parse_row(row.values, row.index, [], diff.errors, categories,
+                                       with_reference=mode == 'upsert', attributes=attributes[position])
+                    has_name = bool(row_product_name(row.values))
+                else:
+                    try:
+                        result = parse_fast_row(row.values, row.index, category, with_reference=mode == 'upsert')
+                    except Exception as e:
+                        diff.errors.append(f"Row {row.index + 1}: {str(e)}")
+                        continue
+                    has_name = not pd.isna(row.values.get('NOM'))
+                if result is not None:
+                    parsed.append((row.index, *result))
+                elif len(diff.errors) == errors_before:
+                    diff.skipped(row.index, has_name)
+            diff.add_batch(parsed)
+
+    return diff.payload(kind, total_rows)
@@ -0,0 +1,168 @@
+"""
+CSV and Parquet product imports.
+
+Excel parsing is the slowest part of an import without images, so the
+import endpoints, the chunked uploads and `python manage.py import_products`
+also accept:
+
+- .csv files, streamed with the csv module (UTF-8, with or without BOM;
+  the delimiter among , ; and tab is the most frequent one of the header);
+- .parquet files, read one row group at a time with pyarrow, when it is
+  installed.
+
+CsvReader and ParquetReader have the interface of workbook.WorkbookReader
+(columns, rows(), count_rows()) and the same column normalization, so the
+batched import pipeline (products/importer.py) reads every format alike.
+They are single-sheet and have no embedded images.
+
+Legacy .xls workbooks (Excel 97-2003) cannot be read by openpyxl and are
+refused up front, with a message asking for .xlsx.
+"""
+import csv
+import os
+
+from .workbook import COUNT_PROGRESS_ROWS, WorkbookReader, WorkbookRow, normalize_columns
+
+WORKBOOK_EXTENSIONS = ('.xlsx',)
+LEGACY_WORKBOOK_EXTENSIONS = ('.xls',)
+CSV_EXTENSIONS = ('.csv',)
+PARQUET_EXTENSIONS = ('.parquet',)
+IMPORT_EXTENSIONS = WORKBOOK_EXTENSIONS + CSV_EXTENSIONS + PARQUET_EXTENSIONS
+
+CSV_DELIMITERS = (',', ';', '\t')
+
+
+def file_extension(path):
+    return os.path.splitext(str(path))[1].lower()
+
+
+def is_workbook(path):
+    return file_extension(path) in WORKBOOK_EXTENSIONS
+
+
+def unsupported_file_error(name, extensions=IMPORT_EXTENSIONS):
+    """Why a file of this name cannot be imported, or None when its extension is accepted"""
+    extension = file_extension(name or '')
+    if extension in extensions:
+        return None
+    if extension in LEGACY_WORKBOOK_EXTENSIONS:
+        return 'Legacy Excel files (.xls) are not supported: save the workbook as .xlsx and import it again'
+    return f"Invalid file type (expected {', '.join(extensions)})"
+
+
+class _SingleSheetReader:
+    """Shared by the CSV and Parquet readers: one sheet named after the format, no images"""
+    sheet = None
+
+    def __init__(self, path, normalize=normalize_columns):
+        self.path = path
+        self.normalize = normalize
+        self.sheet_names = [self.sheet]
+        self._columns = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        pass
+
+    @property
+    def columns(self):
+        if self._columns is None:
+            self._columns = self.normalize(self.headers())
+        return self._columns
+
+    @property
+    def offsets(self):
+        return {self.sheet: 0}
+
+    def count_rows(self, progress=None):
+        count = 0
+        for count, _ in enumerate(self.rows(), 1):
+            if progress is not None and count % COUNT_PROGRESS_ROWS == 0:
+                progress()
+        return count
+
+
+class CsvReader(_SingleSheetReader):
+    """Streaming reader over the rows of a CSV file; empty cells read as None, blank lines are skipped"""
+    sheet = 'csv'
+
+    def __init__(self, path, normalize=normalize_columns):
+        super().__init__(path, normalize)
+        # csv.Sniffer is easily fooled by the descriptions; the header line is not
+        with open(path, newline='', encoding='utf-8-sig') as source:
+            header = source.readline()
+        self.delimiter = max(CSV_DELIMITERS, key=header.count)
+
+    def _records(self):
+        with open(self.path, newline='', encoding='utf-8-sig') as source:
+            for record in csv.reader(source, delimiter=self.delimiter):
+                if any(value.strip() for value in record):
+                    yield record
+
+    def headers(self):
+        return next(self._records(), [])
+
+    def rows(self, skip=0):
+        columns = self.columns
+        records = self._records()
+        next(records, None)
+        for index, record in enumerate(records):
+            if index < skip:
+                continue
+            values = [value if value.strip() else None for value in record]
+            yield WorkbookRow(index, self.sheet, dict(zip(columns, values)))
+
+
+class ParquetReader(_SingleSheetReader):
+    """Reader over a Parquet file, one row group in memory at a time (requires pyarrow)"""
+    sheet = 'parquet'
+
+    def __init__(self, path, normalize=normalize_columns):
+        super().__init__(path, normalize)
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError('Parquet imports require pyarrow (pip install pyarrow)')
+        self.file = pq.ParquetFile(path)
+
+    def close(self):
+        # ParquetFile.close() appeared in pyarrow 11
+        close = getattr(self.file, 'close', None)
+        if close is not None:
+            close()
+
+    def headers(self):
+        return self.file.schema_arrow.names
+
+    def count_rows(self, progress=None):
+        return self.file.metadata.num_rows
+
+    def rows(self, skip=0):
+        columns = self.columns
+        index = 0
+        for group in range(self.file.num_row_groups):
+            group_rows = self.file.metadata.row_group(group).num_rows
+            if index + group_rows <= skip:
+                # Resumed job: whole row groups already imported are not read
+                index += group_rows
+                continue
+            table = self.file.read_row_group(group)
+            for values in zip(*(column.to_pylist() for column in table.columns)):
+                if index >= skip:
+                    yield WorkbookRow(index, self.sheet, dict(zip(columns, values)))
+                index += 1
+
+
+def open_reader(path, sheets=None):
+    """Reader for an import file, chosen by extension (`sheets` only applies to workbooks)"""
+    extension = file_extension(path)
+    if extension in CSV_EXTENSIONS:
+        return CsvReader(path)
+    if extension in PARQUET_EXTENSIONS:
+        return ParquetReader(path)
+    return WorkbookReader(path, sheets=sheets)
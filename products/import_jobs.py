@@ -0,0 +1,183 @@
+"""
+Background Excel import jobs.
+
+The import endpoints store the uploaded workbook under IMPORT_JOBS_DIR,
+create an ImportJob and return immediately; the job runs in a worker thread
+of the web process, or in `python manage.py process_import_jobs` when
+imports must survive web restarts. Clients poll the job for progress and
+can cancel it between batches.
+
+A job claims itself with a conditional UPDATE (pending -> running) that
+also increments its attempt, so a job is never processed twice. Running
+jobs refresh heartbeat_at with every batch and during the long steps
+between batches (row counting, image uploads); one whose heartbeat is
+older than IMPORT_JOB_STALE_SECONDS belongs to a dead worker and is put
+back to pending, and resumes after its last committed batch. Progress is
+only written for the current attempt: a worker that was wrongly presumed
+dead gets ImportJobLost at its next write and stops.
+"""
+import os
+import threading
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.db.models import F
+from django.utils import timezone
+
+from .importer import ImportCancelled, ImportFileError, run_fast_import, run_full_import
+from .models import ImportJob, ImportJobLost, Product
+from .related import rebuild_for_products
+
+RUNNERS = {
+    'full': run_full_import,
+    'fast': run_fast_import,
+}
+
+
+def import_jobs_dir():
+    path = getattr(settings, 'IMPORT_JOBS_DIR', os.path.join(settings.BASE_DIR, 'import_jobs'))
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def create_job(uploaded_file, kind='full', user=None, mode='create'):
+    """Store the upload on disk and create its pending ImportJob"""
+    extension = os.path.splitext(uploaded_file.name)[1].lower() or '.xlsx'
+    file_path = os.path.join(import_jobs_dir(), f"{uuid.uuid4().hex}{extension}")
+    with open(file_path, 'wb') as destination:
+        for chunk in uploaded_file.chunks():
+            destination.write(chunk)
+    return create_job_for_file(file_path, uploaded_file.name, kind=kind, user=user, mode=mode)
+
+
+def create_job_for_file(file_path, original_name, kind='full', user=None, mode='create'):
+    """Pending ImportJob for a workbook already stored under IMPORT_JOBS_DIR"""
+    return ImportJob.objects.create(
+        kind=kind,
+        mode=mode,
+        file_path=file_path,
+        original_name=original_name[:255],
+        created_by=user if user is not None and user.is_authenticated else None,
+    )
+
+
+def _finish(job, status, **fields):
+    """Final status of this attempt; False if another worker took the job over"""
+    job.status = status
+    job.finished_at = timezone.now()
+    for field, value in fields.items():
+        setattr(job, field, value)
+    return bool(ImportJob.objects.filter(pk=job.pk, status='running', attempt=job.attempt).update(
+        status=status, finished_at=job.finished_at, total_rows=job.total_rows, **fields,
+    ))
+
+
+def _remove_file(job):
+    try:
+        os.unlink(job.file_path)
+    except OSError:
+        pass
+
+
+def _rebuild_related(job):
+    """Related lists of the products the job wrote (bulk writes send no post_save)"""
+    try:
+        links = rebuild_for_products(Product.objects.filter(updated_at__gte=job.started_at))
+    except Exception as e:
+        print(f"⚠️ Related products not rebuilt after import job #{job.pk}: {e}")
+    else:
+        print(f"✅ Related products rebuilt after import job #{job.pk}: {links} links")
+
+
+def run_job(job_id):
+    """Process a pending job; returns the job, or None if another worker claimed it"""
+    now = timezone.now()
+    claimed = ImportJob.objects.filter(pk=job_id, status='pending').update(
+        status='running', heartbeat_at=now, attempt=F('attempt') + 1,
+    )
+    if not claimed:
+        return None
+    job = ImportJob.objects.get(pk=job_id)
+    if job.started_at is None:
+        job.started_at = now
+        job.save(update_fields=['started_at'])
+
+    print(f"🔄 Import job #{job.pk} ({job.kind}) started at row {job.rows_processed + 1}")
+    try:
+        result = RUNNERS[job.kind](job)
+    except ImportJobLost:
+        # The worker now owning the job finishes it (and removes its file)
+        print(f"⚠️ Import job #{job.pk} taken over by another worker, attempt {job.attempt} stopped")
+    except ImportCancelled:
+        if _finish(job, 'cancelled'):
+            _remove_file(job)
+            _rebuild_related(job)
+        print(f"⏹️ Import job #{job.pk} cancelled after {job.rows_processed} rows")
+    except ImportFileError as e:
+        if _finish(job, 'failed', result=e.payload):
+            _remove_file(job)
+        print(f"❌ Import job #{job.pk} rejected: {e.payload.get('error')}")
+    except Exception as e:
+        # Keep the file: the job can be resumed once the cause is fixed
+        _finish(job, 'failed', result={'error': str(e), 'type': type(e).__name__, 'traceback': traceback.format_exc()})
+        print(f"❌ Import job #{job.pk} failed: {e}")
+    else:
+        if _finish(job, 'completed', result=result):
+            _remove_file(job)
+            _rebuild_related(job)
+        print(f"✅ Import job #{job.pk} completed: {job.created_count} created, {job.error_count} errors")
+    return job
+
+
+def _run_in_thread(job_id):
+    try:
+        run_job(job_id)
+    finally:
+        connection.close()
+
+
+def start_job_thread(job):
+    """Run the job in a daemon thread of the current process"""
+    thread = threading.Thread(target=_run_in_thread, args=(job.pk,), name=f"import-job-{job.pk}", daemon=True)
+    thread.start()
+    return thread
+
+
+def requeue_stale_jobs():
+    """Put running jobs whose worker stopped sending heartbeats back to pending; returns their ids"""
+    stale_seconds = getattr(settings, 'IMPORT_JOB_STALE_SECONDS', 300)
+    threshold = timezone.now() - timedelta(seconds=stale_seconds)
+    stale = list(ImportJob.objects.filter(status='running', heartbeat_at__lt=threshold).values_list('pk', flat=True))
+    if stale:
+        ImportJob.objects.filter(pk__in=stale, status='running', heartbeat_at__lt=threshold).update(status='pending')
+    return stale
+
+
+def resume_job(job):
+    """Queue a failed or stale job again from its last committed batch; returns False if it cannot resume"""
+    requeue_stale_jobs()
+    if job.kind not in RUNNERS or not os.path.exists(job.file_path):
+        return False
+    resumed = ImportJob.objects.filter(pk=job.pk, status__in=('failed', 'pending')).update(
+        status='pending', cancel_requested=False, finished_at=None, result=None,
+    )
+    if resumed:
+        job.refresh_from_db()
+    return bool(resumed)
+
+
+def process_pending_jobs():
+    """Run every pending job in this process, oldest first; returns how many ran"""
+    from .import_uploads import expire_stale_uploads
+
+    close_old_connections()
+    requeue_stale_jobs()
+    expire_stale_uploads()
+    count = 0
+    for job_id in ImportJob.objects.filter(status='pending').order_by('created_at').values_list('pk', flat=True):
+        if run_job(job_id) is not None:
+            count += 1
+    return count
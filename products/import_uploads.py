@@ -0,0 +1,159 @@
+"""
+Chunked, resumable uploads of import workbooks.
+
+A workbook posted to the import endpoints is buffered in the worker's memory
+(up to FILE_UPLOAD_MAX_MEMORY_SIZE) before being copied to disk, and a
+dropped connection means sending it all again. Large files can instead be
+sent in chunks:
+
+1. POST import/uploads/ with the file name and size (plus the import kind
+   and mode) opens an upload;
+2. PUT import/uploads/<token>/?offset=N with the raw bytes of a chunk; the
+   request body is streamed to the upload's file on disk;
+3. GET import/uploads/<token>/ tells how many bytes arrived, to resume
+   after a failure;
+4. POST import/uploads/<token>/complete/ with the SHA-256 of the file checks
+   the assembled file and hands it to an ImportJob (products/import_jobs.py).
+
+Uploads left unfinished for IMPORT_UPLOAD_EXPIRY_HOURS are expired and their
+file removed.
+"""
+import hashlib
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .import_formats import unsupported_file_error
+from .import_jobs import create_job_for_file, import_jobs_dir
+from .models import ImportUpload
+
+# Bytes read from the request (or the file, for the checksum) at a time
+COPY_BUFFER_SIZE = 64 * 1024
+
+
+class UploadError(Exception):
+    """Rejected upload request; `received` is set when the client must resume from another offset"""
+
+    def __init__(self, message, received=None):
+        super().__init__(message)
+        self.received = received
+
+
+def max_upload_size():
+    return getattr(settings, 'IMPORT_UPLOAD_MAX_SIZE', 500 * 1024 * 1024)
+
+
+def max_chunk_size():
+    return getattr(settings, 'IMPORT_UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024)
+
+
+def _remove_file(path):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+def expire_stale_uploads():
+    """Expire the uploads without a chunk for IMPORT_UPLOAD_EXPIRY_HOURS; returns how many"""
+    hours = getattr(settings, 'IMPORT_UPLOAD_EXPIRY_HOURS', 24)
+    stale = ImportUpload.objects.filter(status='uploading', updated_at__lt=timezone.now() - timedelta(hours=hours))
+    count = 0
+    for upload in stale:
+        if ImportUpload.objects.filter(pk=upload.pk, status='uploading').update(status='expired'):
+            _remove_file(upload.file_path)
+            count += 1
+    return count
+
+
+def create_upload(name, size, kind='full', mode='create', user=None):
+    """Open a chunked upload of `size` bytes; raises UploadError"""
+    expire_stale_uploads()
+    error = unsupported_file_error(name)
+    if error:
+        raise UploadError(error)
+    if size <= 0:
+        raise UploadError('Taille de fichier invalide')
+    if size > max_upload_size():
+        raise UploadError(f"Fichier trop volumineux (maximum {max_upload_size()} octets)")
+
+    upload = ImportUpload(
+        kind=kind,
+        mode=mode,
+        original_name=name[:255],
+        size=size,
+        created_by=user if user is not None and user.is_authenticated else None,
+    )
+    upload.file_path = os.path.join(import_jobs_dir(), f"{upload.token.hex}.part")
+    open(upload.file_path, 'wb').close()
+    upload.save()
+    return upload
+
+
+def write_chunk(upload, offset, stream):
+    """Write the bytes of `stream` (the request body) at `offset` of the upload's file.
+
+    A chunk may start before `received` (a resent chunk overwrites the same
+    bytes) but not after it: nothing would fill the gap.
+    """
+    if upload.status != 'uploading':
+        raise UploadError(f"Envoi déjà terminé ({upload.get_status_display()})")
+    if offset < 0 or offset > upload.received:
+        raise UploadError(f"Offset invalide: {offset}, reprendre à {upload.received}", received=upload.received)
+
+    limit = min(max_chunk_size(), upload.size - offset)
+    written = 0
+    with open(upload.file_path, 'r+b') as destination:
+        destination.seek(offset)
+        while True:
+            # One byte more than allowed, to detect oversized chunks
+            data = stream.read(min(COPY_BUFFER_SIZE, limit + 1 - written))
+            if not data:
+                break
+            written += len(data)
+            if written > limit:
+                raise UploadError(
+                    f"Bloc trop volumineux (maximum {max_chunk_size()} octets, fichier de {upload.size} octets)"
+                )
+            destination.write(data)
+
+    # Concurrent chunks only ever move `received` forward
+    ImportUpload.objects.filter(pk=upload.pk, received__lt=offset + written).update(
+        received=offset + written, updated_at=timezone.now(),
+    )
+    upload.refresh_from_db(fields=['received', 'updated_at'])
+    return upload
+
+
+def file_checksum(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as source:
+        for data in iter(lambda: source.read(COPY_BUFFER_SIZE), b''):
+            digest.update(data)
+    return digest.hexdigest()
+
+
+def complete_upload(upload, checksum):
+    """Check the assembled file against its SHA-256 and create its ImportJob; returns the job"""
+    if upload.status != 'uploading':
+        raise UploadError(f"Envoi déjà terminé ({upload.get_status_display()})")
+    if upload.received != upload.size:
+        raise UploadError(f"Fichier incomplet: {upload.received}/{upload.size} octets reçus", received=upload.received)
+    if not checksum or file_checksum(upload.file_path) != checksum.strip().lower():
+        # The chunks can be sent again from offset 0
+        raise UploadError('Empreinte SHA-256 invalide', received=0)
+
+    extension = os.path.splitext(upload.original_name)[1].lower()
+    file_path = os.path.join(import_jobs_dir(), f"{upload.token.hex}{extension}")
+    with transaction.atomic():
+        if not ImportUpload.objects.filter(pk=upload.pk, status='uploading').update(status='completed'):
+            raise UploadError('Envoi déjà terminé')
+        job = create_job_for_file(file_path, upload.original_name, kind=upload.kind, user=upload.created_by,
+                                  mode=upload.mode)
+        ImportUpload.objects.filter(pk=upload.pk).update(job=job, file_path=file_path)
+        os.replace(upload.file_path, file_path)
+    upload.refresh_from_db()
+    return job
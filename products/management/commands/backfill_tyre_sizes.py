@@ -0,0 +1,58 @@
+"""
+Fill the structured size columns (width, aspect_ratio, rim_diameter, load_index,
+speed_rating, construction, overall_diameter) for existing products.
+Run: python manage.py backfill_tyre_sizes
+"""
+from django.core.management.base import BaseCommand
+from products.models import Product
+from products.tyre_size import SIZE_FIELDS
+
+
+class Command(BaseCommand):
+    help = 'Parse Product.size into the indexed tyre dimension columns'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show how many products would change without saving',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of products written per UPDATE batch',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        batch_size = options['batch_size']
+        updated = 0
+        unparsed = 0
+        pending = []
+
+        products = Product.objects.only('id', 'name', 'size', *SIZE_FIELDS).order_by('id')
+        for product in products.iterator(chunk_size=batch_size):
+            before = tuple(getattr(product, field) for field in SIZE_FIELDS)
+            product.refresh_size_fields()
+            after = tuple(getattr(product, field) for field in SIZE_FIELDS)
+
+            if product.width is None:
+                unparsed += 1
+            if before == after:
+                continue
+
+            updated += 1
+            pending.append(product)
+            if len(pending) >= batch_size:
+                if not dry_run:
+                    Product.objects.bulk_update(pending, SIZE_FIELDS)
+                pending = []
+
+        if pending and not dry_run:
+            Product.objects.bulk_update(pending, SIZE_FIELDS)
+
+        mode = '(DRY RUN) ' if dry_run else ''
+        self.stdout.write(self.style.SUCCESS(
+            f"{mode}Done. Updated: {updated}, Without a recognisable size: {unparsed}"
+        ))
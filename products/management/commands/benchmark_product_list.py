@@ -0,0 +1,99 @@
+"""
+Compare ProductSerializer with the values()-based ProductRowRenderer used by
+the product list: checks that both produce the same JSON, then times them.
+Run: python manage.py benchmark_product_list [--sizes 20 100 1000] [--repeat 7]
+
+When the catalog has fewer products than the largest size, synthetic products
+are created inside a transaction that is rolled back at the end.
+"""
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from products.fast_serialization import ProductRowRenderer
+from products.models import Category, Product
+from products.serializers import PRODUCT_CARD_FIELDS, ProductSerializer
+
+
+class Command(BaseCommand):
+    help = 'Check output parity and measure ProductSerializer vs the values() list renderer'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[20, 100, 1000])
+        parser.add_argument('--repeat', type=int, default=7, help='Timings keep the best run')
+
+    def handle(self, *args, **options):
+        sizes = options['sizes']
+        with transaction.atomic():
+            self.ensure_products(max(sizes))
+            try:
+                for label, fields in (('full', None), ('card', PRODUCT_CARD_FIELDS)):
+                    for size in sizes:
+                        self.compare(size, fields, label, options['repeat'])
+            finally:
+                transaction.set_rollback(True)
+
+    def ensure_products(self, count):
+        missing = count - Product.objects.filter(is_active=True).count()
+        if missing <= 0:
+            return
+        category = Category.objects.first() or Category.objects.create(name='Benchmark', slug='benchmark')
+        seasons = ('summer', 'winter', 'all_season')
+        Product.objects.bulk_create([
+            Product(
+                name=f'Benchmark {i} 205/55R16 91V',
+                slug=f'benchmark-{i}',
+                description='Pneu de test\n' * 5,
+                price=Decimal('100.00') + i,
+                old_price=Decimal('150.00') + i if i % 3 == 0 else None,
+                category=category,
+                image=f'https://example.com/{i}.jpg',
+                brand='Benchmark',
+                size='205/55R16',
+                season=seasons[i % 3],
+                stock=i % 20,
+            )
+            for i in range(missing)
+        ], batch_size=500)
+        self.stdout.write(f"Created {missing} temporary products (rolled back at the end)")
+
+    def compare(self, size, fields, label, repeat):
+        queryset = Product.objects.filter(is_active=True).select_related('category').order_by('-created_at', 'id')[:size]
+
+        def with_serializer():
+            return ProductSerializer(list(queryset), many=True, fields=fields).data
+
+        renderer = ProductRowRenderer(fields=fields)
+
+        def with_renderer():
+            return renderer.render(queryset.values(*renderer.columns))
+
+        expected = JSONRenderer().render(with_serializer())
+        actual = JSONRenderer().render(with_renderer())
+        if expected != actual:
+            raise CommandError(f"Output differs for {label} x {size}:\n{expected[:500]}\n{actual[:500]}")
+
+        slow = self.best_time(with_serializer, repeat)
+        fast = self.best_time(with_renderer, repeat)
+
+        # Serialization alone, rows already fetched
+        instances, rows = list(queryset), list(queryset.values(*renderer.columns))
+        slow_cpu = self.best_time(lambda: ProductSerializer(instances, many=True, fields=fields).data, repeat)
+        fast_cpu = self.best_time(lambda: renderer.render(rows), repeat)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{label:>4} x {size:>5}: query+serialize {slow * 1000:7.2f} -> {fast * 1000:7.2f} ms (x{slow / fast:.1f}) | "
+            f"serialize only {slow_cpu * 1000:7.2f} -> {fast_cpu * 1000:7.2f} ms (x{slow_cpu / fast_cpu:.1f}) | identical output"
+        ))
+
+    def best_time(self, func, repeat):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
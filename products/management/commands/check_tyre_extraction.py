@@ -0,0 +1,66 @@
+"""
+Compare the column-wise tyre attribute extraction of the imports
+(products.tyre_attributes.extract_attributes) with the per-row reference
+functions (extract_tire_info, determine_season, determine_category).
+Run: python manage.py check_tyre_extraction [--file names.txt]
+
+Without --file the names and descriptions of the catalog products are used;
+the file holds one product name per line (no description).
+"""
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products.importer import determine_category, determine_season, extract_tire_info
+from products.models import Product
+from products.tyre_attributes import ATTRIBUTE_COLUMNS, extract_attributes
+
+
+def reference_attributes(name, description):
+    info = extract_tire_info(name)
+    return {
+        **{column: info[column] for column in ATTRIBUTE_COLUMNS if column in info},
+        'season': determine_season(name, description),
+        'category': determine_category(name, description),
+    }
+
+
+class Command(BaseCommand):
+    help = 'Check that the batched tyre attribute extraction matches the per-row functions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', help='Text file with one product name per line')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Names extracted per batch')
+        parser.add_argument('--show', type=int, default=10, help='Mismatches printed')
+
+    def handle(self, *args, **options):
+        if options['file']:
+            with open(options['file'], encoding='utf-8') as names_file:
+                pairs = [(line.strip(), '') for line in names_file if line.strip()]
+        else:
+            pairs = list(Product.objects.order_by('id').values_list('name', 'description'))
+
+        checked = 0
+        mismatches = Counter()
+        shown = 0
+        batch_size = options['batch_size']
+        for start in range(0, len(pairs), batch_size):
+            batch = pairs[start:start + batch_size]
+            batched = extract_attributes([name for name, _ in batch], [description for _, description in batch])
+            for (name, description), attributes in zip(batch, batched):
+                checked += 1
+                expected = reference_attributes(name, description)
+                for column in ATTRIBUTE_COLUMNS:
+                    if attributes[column] == expected[column]:
+                        continue
+                    mismatches[column] += 1
+                    if shown < options['show']:
+                        shown += 1
+                        self.stdout.write(
+                            f"{name!r}: {column} = {attributes[column]!r}, expected {expected[column]!r}"
+                        )
+
+        if mismatches:
+            details = ', '.join(f"{column}: {count}" for column, count in mismatches.items())
+            raise CommandError(f"{sum(mismatches.values())} mismatches over {checked} names ({details})")
+        self.stdout.write(self.style.SUCCESS(f"Done. {checked} names, no mismatch"))
@@ -0,0 +1,60 @@
+"""
+Import a product file (.xlsx, .csv or .parquet) from the command line, e.g.
+for the nightly ERP sync.
+Run: python manage.py import_products prices.csv [--kind fast] [--mode upsert] [--dry-run]
+
+The file is copied under IMPORT_JOBS_DIR and imported by an ImportJob in
+this process, through the same batched pipeline as the import endpoints;
+the original file is left untouched.
+"""
+import json
+import os
+import shutil
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products.import_dry_run import dry_run_import
+from products.import_formats import file_extension, unsupported_file_error
+from products.import_jobs import create_job_for_file, import_jobs_dir, run_job
+from products.importer import ImportFileError
+from products.upsert import IMPORT_MODES
+
+
+class Command(BaseCommand):
+    help = 'Import products from an Excel, CSV or Parquet file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import (.xlsx, .csv or .parquet)')
+        parser.add_argument('--kind', choices=('full', 'fast'), default='full', help='Import pipeline (default: full)')
+        parser.add_argument('--mode', choices=IMPORT_MODES, default='create', help='create or upsert (default: create)')
+        parser.add_argument('--dry-run', action='store_true', help='Only report what the import would change')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.isfile(path):
+            raise CommandError(f"File not found: {path}")
+        error = unsupported_file_error(path)
+        if error:
+            raise CommandError(error)
+
+        if options['dry_run']:
+            try:
+                result = dry_run_import(path, kind=options['kind'], mode=options['mode'])
+            except ImportFileError as e:
+                raise CommandError(e.payload.get('error'))
+            self.stdout.write(json.dumps(result, indent=2, ensure_ascii=False))
+            return
+
+        # The job removes its file once imported
+        file_path = os.path.join(import_jobs_dir(), f"{uuid.uuid4().hex}{file_extension(path)}")
+        shutil.copyfile(path, file_path)
+        job = create_job_for_file(file_path, os.path.basename(path), kind=options['kind'], mode=options['mode'])
+        job = run_job(job.pk)
+
+        if job.status != 'completed':
+            raise CommandError(f"Import job #{job.pk} {job.status}: {(job.result or {}).get('error')}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Import job #{job.pk} done. Created: {job.created_count}, Updated: {job.updated_count}, "
+            f"Unchanged: {job.unchanged_count}, Errors: {job.error_count}"
+        ))
@@ -0,0 +1,88 @@
+"""
+Load original equipment tyre sizes per vehicle from a CSV or Excel file.
+Run: python manage.py load_vehicle_fitments fitments.xlsx [--sheet NAME] [--dry-run]
+
+Expected columns (French headers accepted, see products/vehicles.py):
+    make, model, variant, years ("2012-2019") or year_start/year_end, axle, size ("205/55R16 91V")
+
+The fitments of every make present in the file are replaced (makes compare
+case-insensitively: "BMW" replaces "Bmw").
+"""
+import pandas as pd
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+
+from products.catalog import bump_catalog_version
+from products.models import VehicleFitment
+from products.vehicles import COLUMN_ALIASES, fitment_from_row
+
+
+class Command(BaseCommand):
+    help = 'Bulk-load the vehicle fitment table (make -> model -> years -> OE tyre sizes)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or Excel file')
+        parser.add_argument('--sheet', default=0, help='Excel sheet name or index (default: first sheet)')
+        parser.add_argument('--dry-run', action='store_true', help='Parse the file without saving')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        try:
+            if path.lower().endswith('.csv'):
+                df = pd.read_csv(path, dtype=str, sep=None, engine='python')
+            else:
+                sheet = options['sheet']
+                df = pd.read_excel(path, sheet_name=int(sheet) if str(sheet).isdigit() else sheet, dtype=str)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Cannot read {path}: {e}")
+
+        df = df.rename(columns=self.column_mapping(df.columns))
+        if not {'make', 'model', 'size'} <= set(df.columns):
+            raise CommandError(f"Missing columns: make, model and size are required (found: {', '.join(df.columns)})")
+        df = df.astype(object).where(pd.notna(df), None)
+
+        fitments = {}
+        makes = {}
+        skipped = 0
+        for row in df.to_dict('records'):
+            values = fitment_from_row(row)
+            if values is None:
+                skipped += 1
+                continue
+            # One spelling per make: the first one in the file
+            values['make'] = makes.setdefault(values['make'].lower(), values['make'])
+            key = tuple(values[field] for field in VehicleFitment._meta.unique_together[0])
+            fitments[key] = VehicleFitment(**values)
+
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(
+                f"(DRY RUN) {len(fitments)} fitments for {len(makes)} makes, {skipped} rows skipped"
+            ))
+            return
+
+        with transaction.atomic():
+            deleted = 0
+            if makes:
+                same_make = Q()
+                for make in makes.values():
+                    same_make |= Q(make__iexact=make)
+                deleted, _ = VehicleFitment.objects.filter(same_make).delete()
+            VehicleFitment.objects.bulk_create(list(fitments.values()), batch_size=options['batch_size'])
+            # Vehicle tree and by-vehicle responses are cached per catalog version
+            bump_catalog_version()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Done. Loaded {len(fitments)} fitments for {len(makes)} makes "
+            f"(replaced {deleted}), {skipped} rows skipped"
+        ))
+
+    def column_mapping(self, columns):
+        mapping = {}
+        for column in columns:
+            normalized = str(column).strip().lower().replace(' ', '_')
+            for field, aliases in COLUMN_ALIASES.items():
+                if normalized in aliases:
+                    mapping[column] = field
+        return mapping
@@ -0,0 +1,29 @@
+"""
+Run pending Excel import jobs outside the web process.
+Run: python manage.py process_import_jobs [--once] [--interval 5]
+
+Without --once the command keeps polling for new jobs; stale running jobs
+(worker died mid-import) are requeued and resume after their last batch.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from products.import_jobs import process_pending_jobs
+
+
+class Command(BaseCommand):
+    help = 'Process pending product import jobs (products.ImportJob)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Process the current queue and exit')
+        parser.add_argument('--interval', type=float, default=5, help='Seconds between polls')
+
+    def handle(self, *args, **options):
+        while True:
+            count = process_pending_jobs()
+            if count:
+                self.stdout.write(self.style.SUCCESS(f"Processed {count} import job(s)"))
+            if options['once']:
+                break
+            time.sleep(options['interval'])
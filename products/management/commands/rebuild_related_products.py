@@ -0,0 +1,14 @@
+"""
+Rebuild the precomputed related products table.
+Run: python manage.py rebuild_related_products  (e.g. nightly, and after large imports)
+"""
+from django.core.management.base import BaseCommand
+from products.related import rebuild_all
+
+
+class Command(BaseCommand):
+    help = 'Rank related products by brand, category, tyre size and co-purchases'
+
+    def handle(self, *args, **options):
+        links = rebuild_all()
+        self.stdout.write(self.style.SUCCESS(f"Done. Wrote {links} related product links"))
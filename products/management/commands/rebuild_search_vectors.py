@@ -0,0 +1,18 @@
+"""
+Recompute the stored full-text vector of every product.
+Run: python manage.py rebuild_search_vectors
+"""
+from django.core.management.base import BaseCommand, CommandError
+from products.models import Product
+from products.search import fulltext_available, refresh_search_vectors
+
+
+class Command(BaseCommand):
+    help = 'Rebuild Product.search_vector (PostgreSQL only)'
+
+    def handle(self, *args, **options):
+        if not fulltext_available():
+            raise CommandError('Full-text search requires a PostgreSQL database')
+
+        updated = refresh_search_vectors(Product.objects.all())
+        self.stdout.write(self.style.SUCCESS(f"Done. Rebuilt search vectors for {updated} products"))
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.7 on 2026-10-18 03:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0018_product_stock_max_product_stock_min'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='aspect_ratio',
+            field=models.PositiveSmallIntegerField(blank=True, db_index=True, null=True, verbose_name='Hauteur'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='construction',
+            field=models.CharField(blank=True, max_length=2, null=True, verbose_name='Structure'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='load_index',
+            field=models.PositiveSmallIntegerField(blank=True, db_index=True, null=True, verbose_name='Indice de charge'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rim_diameter',
+            field=models.PositiveSmallIntegerField(blank=True, db_index=True, null=True, verbose_name='Diamètre'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='speed_rating',
+            field=models.CharField(blank=True, db_index=True, max_length=2, null=True, verbose_name='Indice de vitesse'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='width',
+            field=models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='Largeur'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['width', 'aspect_ratio', 'rim_diameter'], name='product_size_idx'),
+        ),
+    ]
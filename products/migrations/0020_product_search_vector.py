@@ -0,0 +1,40 @@
+# Generated by Django 4.2.7 on 2026-10-18 03:19
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+def populate_search_vectors(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    from django.contrib.postgres.search import SearchVector
+
+    Product = apps.get_model('products', 'Product')
+    Product.objects.update(search_vector=(
+        SearchVector('name', weight='A', config='french')
+        + SearchVector('reference', weight='A', config='french')
+        + SearchVector('brand', weight='B', config='french')
+        + SearchVector('size', weight='C', config='french')
+        + SearchVector('description', weight='D', config='french')
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0019_product_structured_size'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='product_search_vector_idx'),
+        ),
+        migrations.RunPython(populate_search_vectors, migrations.RunPython.noop),
+    ]
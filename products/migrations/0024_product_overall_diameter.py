@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-18 03:30
+
+from django.db import migrations, models
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Round
+
+
+def populate_overall_diameter(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    Product.objects.filter(width__isnull=False, aspect_ratio__isnull=False, rim_diameter__isnull=False).update(
+        overall_diameter=Round(
+            F('rim_diameter') * Value(25.4) + F('width') * F('aspect_ratio') * Value(0.02),
+            1,
+            output_field=FloatField(),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0023_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='overall_diameter',
+            field=models.FloatField(blank=True, db_index=True, null=True, verbose_name='Diamètre extérieur (mm)'),
+        ),
+        migrations.RunPython(populate_overall_diameter, migrations.RunPython.noop),
+    ]
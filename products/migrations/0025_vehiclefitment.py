@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-18 03:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0024_product_overall_diameter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VehicleFitment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('make', models.CharField(max_length=100, verbose_name='Marque')),
+                ('model', models.CharField(max_length=100, verbose_name='Modèle')),
+                ('variant', models.CharField(blank=True, default='', max_length=100, verbose_name='Version')),
+                ('year_start', models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='Année de début')),
+                ('year_end', models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='Année de fin')),
+                ('axle', models.CharField(choices=[('both', 'Avant et arrière'), ('front', 'Avant'), ('rear', 'Arrière')], default='both', max_length=10, verbose_name='Essieu')),
+                ('width', models.PositiveSmallIntegerField(verbose_name='Largeur')),
+                ('aspect_ratio', models.PositiveSmallIntegerField(verbose_name='Hauteur')),
+                ('rim_diameter', models.PositiveSmallIntegerField(verbose_name='Diamètre')),
+                ('load_index', models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='Indice de charge')),
+                ('speed_rating', models.CharField(blank=True, max_length=2, null=True, verbose_name='Indice de vitesse')),
+            ],
+            options={
+                'verbose_name': "Monte d'origine",
+                'verbose_name_plural': "Montes d'origine",
+                'ordering': ['make', 'model', 'year_start'],
+                'indexes': [models.Index(fields=['make', 'model'], name='fitment_vehicle_idx'), models.Index(fields=['width', 'aspect_ratio', 'rim_diameter'], name='fitment_size_idx')],
+                'unique_together': {('make', 'model', 'variant', 'year_start', 'year_end', 'axle', 'width', 'aspect_ratio', 'rim_diameter')},
+            },
+        ),
+    ]
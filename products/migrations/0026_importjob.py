@@ -0,0 +1,46 @@
+# Generated by Django 4.2.7 on 2026-10-18 03:35
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('products', '0025_vehiclefitment'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('full', 'Import complet (avec images)'), ('fast', 'Import rapide')], default='full', max_length=10, verbose_name='Type')),
+                ('status', models.CharField(choices=[('pending', 'En attente'), ('running', 'En cours'), ('completed', 'Terminé'), ('failed', 'Échoué'), ('cancelled', 'Annulé')], db_index=True, default='pending', max_length=10, verbose_name='Statut')),
+                ('file_path', models.CharField(max_length=500, verbose_name='Fichier')),
+                ('original_name', models.CharField(blank=True, max_length=255, verbose_name='Nom du fichier')),
+                ('total_rows', models.PositiveIntegerField(default=0, verbose_name='Lignes')),
+                ('rows_processed', models.PositiveIntegerField(default=0, verbose_name='Lignes traitées')),
+                ('created_count', models.PositiveIntegerField(default=0, verbose_name='Produits créés')),
+                ('updated_count', models.PositiveIntegerField(default=0, verbose_name='Produits mis à jour')),
+                ('error_count', models.PositiveIntegerField(default=0, verbose_name='Erreurs')),
+                ('images_uploaded', models.PositiveIntegerField(default=0, verbose_name='Images envoyées')),
+                ('errors', models.JSONField(blank=True, default=list, verbose_name='Détail des erreurs')),
+                ('row_images', models.JSONField(blank=True, null=True)),
+                ('result', models.JSONField(blank=True, null=True, verbose_name='Résultat')),
+                ('cancel_requested', models.BooleanField(default=False, verbose_name='Annulation demandée')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Créé le')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Démarré le')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Terminé le')),
+                ('heartbeat_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Créé par')),
+            ],
+            options={
+                'verbose_name': 'Import Excel',
+                'verbose_name_plural': 'Imports Excel',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.7 on 2026-10-18 03:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0026_importjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportedImage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64, unique=True, verbose_name='Empreinte SHA-256')),
+                ('url', models.URLField(max_length=1000, verbose_name='URL')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Créé le')),
+            ],
+            options={
+                'verbose_name': 'Image importée',
+                'verbose_name_plural': 'Images importées',
+            },
+        ),
+    ]
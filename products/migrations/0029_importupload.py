@@ -0,0 +1,40 @@
+# Generated by Django 4.2.7 on 2026-10-18 03:52
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('products', '0028_importjob_mode'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportUpload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('kind', models.CharField(choices=[('full', 'Import complet (avec images)'), ('fast', 'Import rapide')], default='full', max_length=10, verbose_name='Type')),
+                ('mode', models.CharField(choices=[('create', 'Création'), ('upsert', 'Création ou mise à jour')], default='create', max_length=10, verbose_name='Mode')),
+                ('status', models.CharField(choices=[('uploading', "En cours d'envoi"), ('completed', 'Terminé'), ('expired', 'Expiré')], db_index=True, default='uploading', max_length=10, verbose_name='Statut')),
+                ('original_name', models.CharField(max_length=255, verbose_name='Nom du fichier')),
+                ('file_path', models.CharField(max_length=500, verbose_name='Fichier')),
+                ('size', models.PositiveBigIntegerField(verbose_name='Taille (octets)')),
+                ('received', models.PositiveBigIntegerField(default=0, verbose_name='Octets reçus')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Créé le')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Mis à jour le')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Créé par')),
+                ('job', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='upload', to='products.importjob', verbose_name='Import')),
+            ],
+            options={
+                'verbose_name': "Envoi de fichier d'import",
+                'verbose_name_plural': "Envois de fichiers d'import",
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0029_importupload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='attempt',
+            field=models.PositiveIntegerField(default=0, verbose_name='Tentative'),
+        ),
+    ]
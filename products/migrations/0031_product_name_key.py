@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:09
+
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def populate_name_keys(apps, schema_editor):
+    # Same normalization as products.upsert.normalize_name
+    Product = apps.get_model('products', 'Product')
+    pending = []
+    for product in Product.objects.only('id', 'name').order_by('id').iterator(chunk_size=BATCH_SIZE):
+        product.name_key = ' '.join(str(product.name).split()).lower()
+        pending.append(product)
+        if len(pending) >= BATCH_SIZE:
+            Product.objects.bulk_update(pending, ['name_key'])
+            pending = []
+    Product.objects.bulk_update(pending, ['name_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0030_importjob_attempt'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='name_key',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=200, verbose_name='Nom normalisé'),
+        ),
+        migrations.RunPython(populate_name_keys, migrations.RunPython.noop),
+    ]
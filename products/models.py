@@ -1,7 +1,16 @@
+import uuid
+
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.utils import timezone
 from decimal import Decimal
 
+from .search import SEARCH_FIELDS, refresh_search_vectors
+from .tyre_size import SIZE_FIELDS, parse_tyre_size
+from .upsert import normalize_name
+
 User = get_user_model()
 
 class Category(models.Model):
@@ -17,6 +26,11 @@ class Category(models.Model):
     def __str__(self):
         return self.name
 
+RELATED_FIELDS = ('category_id', 'brand', 'width', 'aspect_ratio', 'rim_diameter', 'is_active')
+# Moved by the cart, orders and purchases; not part of the cached catalog representations
+STOCK_FIELDS = ('stock', 'stock_min', 'stock_max')
+
+
 class Product(models.Model):
     name = models.CharField(max_length=200, verbose_name="Nom")
     slug = models.SlugField(unique=True, verbose_name="Slug")
@@ -49,13 +63,97 @@ class Product(models.Model):
     emplacement = models.CharField(max_length=255, blank=True, null=True, verbose_name="Emplacement")
     fabrication_date = models.DateField(blank=True, null=True, verbose_name="Date de fabrication")
 
+    # Structured tyre size, parsed from `size` (and `name` for load/speed) on save
+    width = models.PositiveSmallIntegerField(blank=True, null=True, verbose_name="Largeur")
+    aspect_ratio = models.PositiveSmallIntegerField(blank=True, null=True, db_index=True, verbose_name="Hauteur")
+    rim_diameter = models.PositiveSmallIntegerField(blank=True, null=True, db_index=True, verbose_name="Diamètre")
+    load_index = models.PositiveSmallIntegerField(blank=True, null=True, db_index=True, verbose_name="Indice de charge")
+    speed_rating = models.CharField(max_length=2, blank=True, null=True, db_index=True, verbose_name="Indice de vitesse")
+    construction = models.CharField(max_length=2, blank=True, null=True, verbose_name="Structure")
+    # Rolling diameter in mm, for equivalent sizes (products/equivalent_sizes.py)
+    overall_diameter = models.FloatField(blank=True, null=True, db_index=True, verbose_name="Diamètre extérieur (mm)")
+
+    # normalize_name(name), to match import rows by name (products/upsert.py)
+    name_key = models.CharField(max_length=200, blank=True, default='', db_index=True, editable=False,
+                                verbose_name="Nom normalisé")
+
+    # Weighted full-text document, see products/search.py
+    search_vector = SearchVectorField(null=True, editable=False)
+
     class Meta:
         verbose_name = "Produit"
         verbose_name_plural = "Produits"
+        indexes = [
+            models.Index(fields=['width', 'aspect_ratio', 'rim_diameter'], name='product_size_idx'),
+            # Keyset pagination (pneushop/pagination.py) on the catalog orderings
+            models.Index(fields=['created_at', 'id'], name='product_created_id_idx'),
+            models.Index(fields=['price', 'id'], name='product_price_id_idx'),
+            GinIndex(fields=['search_vector'], name='product_search_vector_idx'),
+        ]
 
     def __str__(self):
         return f"{self.brand} {self.name} - {self.size}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot_tracked_fields()
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._snapshot_tracked_fields()
+
+    def _snapshot_tracked_fields(self):
+        # Derived data (search vector, related products, catalog caches) only needs work when fields change
+        self._loaded_values = {field.attname: self.__dict__.get(field.attname) for field in self._meta.concrete_fields}
+
+    def changed_fields(self):
+        """Fields (attnames) modified since the product was loaded (all of them for a new product)"""
+        loaded = getattr(self, '_loaded_values', None)
+        if self._state.adding or loaded is None:
+            return {field.attname for field in self._meta.concrete_fields}
+        return {field for field, value in loaded.items() if self.__dict__.get(field) != value}
+
+    def changes_catalog(self):
+        """Whether saving the product changes what the catalog shows (and must invalidate its caches).
+
+        Stock moves from the cart, orders and purchases do not, unless the
+        product runs out of stock or comes back (?in_stock=true, bitmap index).
+        """
+        if self.changed_fields() - set(STOCK_FIELDS) - {'updated_at'}:
+            return True
+        return ((self._loaded_values.get('stock') or 0) > 0) != ((self.stock or 0) > 0)
+
+    def save(self, *args, **kwargs):
+        self.refresh_size_fields()
+        self.name_key = normalize_name(self.name)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and ('size' in update_fields or 'name' in update_fields):
+            kwargs['update_fields'] = set(update_fields) | set(SIZE_FIELDS)
+            if 'name' in update_fields:
+                kwargs['update_fields'].add('name_key')
+        changed = self.changed_fields()
+        super().save(*args, **kwargs)
+
+        if changed & set(SEARCH_FIELDS):
+            refresh_search_vectors(Product.objects.filter(pk=self.pk))
+        self._snapshot_tracked_fields()
+
+    def refresh_size_fields(self):
+        """Fill the structured size columns from `size`, falling back to `name`"""
+        parsed = parse_tyre_size(self.size)
+        from_name = parse_tyre_size(self.name)
+        if parsed['width'] is None:
+            parsed = from_name
+        elif parsed['load_index'] is None and from_name['width'] == parsed['width'] \
+                and from_name['rim_diameter'] == parsed['rim_diameter']:
+            # Imported sizes are cut at the rim ("205/55R16"), the name keeps "91V"
+            parsed['load_index'] = from_name['load_index']
+            parsed['speed_rating'] = from_name['speed_rating']
+        for field, value in parsed.items():
+            setattr(self, field, value)
+
     @property
     def is_on_sale(self):
         return self.old_price and self.old_price > self.price
@@ -67,6 +165,202 @@ class Product(models.Model):
         return 0
 
 
+class RelatedProduct(models.Model):
+    """Precomputed "related products" of a product, rebuilt by rebuild_related_products"""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='related_links')
+    related = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField(default=0)
+
+    class Meta:
+        ordering = ['-score']
+        unique_together = ('product', 'related')
+        verbose_name = "Produit associé"
+        verbose_name_plural = "Produits associés"
+
+    def __str__(self):
+        return f"{self.product_id} -> {self.related_id} ({self.score:.2f})"
+
+
+class VehicleFitment(models.Model):
+    """Original equipment tyre size of a vehicle (make -> model -> years), see products/vehicles.py"""
+    AXLE_CHOICES = [
+        ('both', 'Avant et arrière'),
+        ('front', 'Avant'),
+        ('rear', 'Arrière'),
+    ]
+
+    make = models.CharField(max_length=100, verbose_name="Marque")
+    model = models.CharField(max_length=100, verbose_name="Modèle")
+    variant = models.CharField(max_length=100, blank=True, default='', verbose_name="Version")
+    year_start = models.PositiveSmallIntegerField(blank=True, null=True, verbose_name="Année de début")
+    year_end = models.PositiveSmallIntegerField(blank=True, null=True, verbose_name="Année de fin")
+    axle = models.CharField(max_length=10, choices=AXLE_CHOICES, default='both', verbose_name="Essieu")
+    width = models.PositiveSmallIntegerField(verbose_name="Largeur")
+    aspect_ratio = models.PositiveSmallIntegerField(verbose_name="Hauteur")
+    rim_diameter = models.PositiveSmallIntegerField(verbose_name="Diamètre")
+    load_index = models.PositiveSmallIntegerField(blank=True, null=True, verbose_name="Indice de charge")
+    speed_rating = models.CharField(max_length=2, blank=True, null=True, verbose_name="Indice de vitesse")
+
+    class Meta:
+        ordering = ['make', 'model', 'year_start']
+        indexes = [
+            models.Index(fields=['make', 'model'], name='fitment_vehicle_idx'),
+            models.Index(fields=['width', 'aspect_ratio', 'rim_diameter'], name='fitment_size_idx'),
+        ]
+        unique_together = (
+            'make', 'model', 'variant', 'year_start', 'year_end', 'axle', 'width', 'aspect_ratio', 'rim_diameter',
+        )
+        verbose_name = "Monte d'origine"
+        verbose_name_plural = "Montes d'origine"
+
+    def __str__(self):
+        years = f"{self.year_start or ''}-{self.year_end or ''}"
+        return f"{self.make} {self.model} {self.variant} ({years}): {self.width}/{self.aspect_ratio}R{self.rim_diameter}"
+
+
+class ImportJobLost(Exception):
+    """Another worker took over the import job (this one was considered dead)"""
+
+
+class ImportJob(models.Model):
+    """Excel import processed by a background worker (products/import_jobs.py)"""
+    KIND_CHOICES = [
+        ('full', 'Import complet (avec images)'),
+        ('fast', 'Import rapide'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'En attente'),
+        ('running', 'En cours'),
+        ('completed', 'Terminé'),
+        ('failed', 'Échoué'),
+        ('cancelled', 'Annulé'),
+    ]
+
+    MODE_CHOICES = [
+        ('create', 'Création'),
+        ('upsert', 'Création ou mise à jour'),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, default='full', verbose_name="Type")
+    mode = models.CharField(max_length=10, choices=MODE_CHOICES, default='create', verbose_name="Mode")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending', db_index=True, verbose_name="Statut")
+    file_path = models.CharField(max_length=500, verbose_name="Fichier")
+    original_name = models.CharField(max_length=255, blank=True, verbose_name="Nom du fichier")
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, verbose_name="Créé par")
+
+    total_rows = models.PositiveIntegerField(default=0, verbose_name="Lignes")
+    rows_processed = models.PositiveIntegerField(default=0, verbose_name="Lignes traitées")
+    created_count = models.PositiveIntegerField(default=0, verbose_name="Produits créés")
+    updated_count = models.PositiveIntegerField(default=0, verbose_name="Produits mis à jour")
+    unchanged_count = models.PositiveIntegerField(default=0, verbose_name="Produits inchangés")
+    error_count = models.PositiveIntegerField(default=0, verbose_name="Erreurs")
+    images_uploaded = models.PositiveIntegerField(default=0, verbose_name="Images envoyées")
+    errors = models.JSONField(default=list, blank=True, verbose_name="Détail des erreurs")
+    # Excel row -> image URLs, kept so a resumed job does not upload them again
+    row_images = models.JSONField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True, verbose_name="Résultat")
+    cancel_requested = models.BooleanField(default=False, verbose_name="Annulation demandée")
+
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Créé le")
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="Démarré le")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Terminé le")
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    # Incremented by each worker claiming the job; only the current one may write progress
+    attempt = models.PositiveIntegerField(default=0, verbose_name="Tentative")
+
+    # Seconds between two heartbeats written outside of save_progress()
+    HEARTBEAT_INTERVAL = 10
+    PROGRESS_FIELDS = (
+        'total_rows', 'rows_processed', 'created_count', 'updated_count', 'unchanged_count', 'error_count',
+        'images_uploaded', 'errors', 'row_images', 'heartbeat_at',
+    )
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Import Excel"
+        verbose_name_plural = "Imports Excel"
+
+    def __str__(self):
+        return f"Import #{self.pk} {self.original_name} ({self.get_status_display()})"
+
+    @property
+    def progress(self):
+        return round(self.rows_processed / self.total_rows * 100, 1) if self.total_rows else 0.0
+
+    @property
+    def is_finished(self):
+        return self.status in ('completed', 'failed', 'cancelled')
+
+    def _owned(self):
+        """This run's job row: still running and not claimed again by another worker"""
+        return ImportJob.objects.filter(pk=self.pk, status='running', attempt=self.attempt)
+
+    def save_progress(self):
+        """Persist the counters (call inside the batch transaction so progress and products commit together).
+
+        Raises ImportJobLost if another worker took the job over, which rolls the batch back.
+        """
+        self.heartbeat_at = timezone.now()
+        if not self._owned().update(**{field: getattr(self, field) for field in self.PROGRESS_FIELDS}):
+            raise ImportJobLost(f"Import job #{self.pk} attempt {self.attempt} was taken over")
+
+    def heartbeat(self):
+        """Show the job is alive during long steps without batches (at most every HEARTBEAT_INTERVAL)"""
+        now = timezone.now()
+        if self.heartbeat_at and (now - self.heartbeat_at).total_seconds() < self.HEARTBEAT_INTERVAL:
+            return
+        if not self._owned().update(heartbeat_at=now):
+            raise ImportJobLost(f"Import job #{self.pk} attempt {self.attempt} was taken over")
+        self.heartbeat_at = now
+
+    def cancellation_requested(self):
+        return ImportJob.objects.filter(pk=self.pk, cancel_requested=True).exists()
+
+
+class ImportUpload(models.Model):
+    """Workbook uploaded in chunks before its import (products/import_uploads.py)"""
+    STATUS_CHOICES = [
+        ('uploading', 'En cours d\'envoi'),
+        ('completed', 'Terminé'),
+        ('expired', 'Expiré'),
+    ]
+
+    token = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    kind = models.CharField(max_length=10, choices=ImportJob.KIND_CHOICES, default='full', verbose_name="Type")
+    mode = models.CharField(max_length=10, choices=ImportJob.MODE_CHOICES, default='create', verbose_name="Mode")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='uploading', db_index=True, verbose_name="Statut")
+    original_name = models.CharField(max_length=255, verbose_name="Nom du fichier")
+    file_path = models.CharField(max_length=500, verbose_name="Fichier")
+    size = models.PositiveBigIntegerField(verbose_name="Taille (octets)")
+    received = models.PositiveBigIntegerField(default=0, verbose_name="Octets reçus")
+    job = models.OneToOneField(ImportJob, on_delete=models.SET_NULL, null=True, blank=True, related_name='upload', verbose_name="Import")
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, verbose_name="Créé par")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Créé le")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Mis à jour le")
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Envoi de fichier d'import"
+        verbose_name_plural = "Envois de fichiers d'import"
+
+    def __str__(self):
+        return f"{self.original_name} ({self.received}/{self.size})"
+
+
+class ImportedImage(models.Model):
+    """Image already uploaded by an import, by content hash (products/image_uploads.py)"""
+    content_hash = models.CharField(max_length=64, unique=True, verbose_name="Empreinte SHA-256")
+    url = models.URLField(max_length=1000, verbose_name="URL")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Créé le")
+
+    class Meta:
+        verbose_name = "Image importée"
+        verbose_name_plural = "Images importées"
+
+    def __str__(self):
+        return self.url
+
+
 class Order(models.Model):
     ORDER_STATUS_CHOICES = [
         ('pending', 'En attente'),
@@ -160,6 +454,9 @@ class StockMovement(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='stockmovement_created_id_idx'),
+        ]
         verbose_name = "Mouvement de stock"
         verbose_name_plural = "Mouvements de stock"
 
@@ -167,6 +464,23 @@ class StockMovement(models.Model):
         return f"{self.get_type_display()} {self.quantity} x {self.product.name}"
 
 
+class CatalogVersion(models.Model):
+    """Single row counter bumped whenever products or categories change.
+
+    Catalog caches (facets, responses, ...) are keyed on this number, so every
+    worker drops its stale entries after a change. See products/catalog.py.
+    """
+    version = models.PositiveBigIntegerField(default=1)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Version du catalogue"
+        verbose_name_plural = "Version du catalogue"
+
+    def __str__(self):
+        return f"Catalogue v{self.version}"
+
+
 class SiteSettings(models.Model):
     # Boutique settings
     nom_boutique = models.CharField(max_length=255, default="PneuShop Tunisia")
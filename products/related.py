@@ -0,0 +1,213 @@
+"""
+Precomputed related products (products.RelatedProduct).
+
+Candidates for a product are the active products of the same category and
+brand, the products of the same tyre size and the products bought in the same
+orders. They are ranked by:
+
+    same brand + same category + size proximity + co-purchase count
+
+The full table is rebuilt by `python manage.py rebuild_related_products`;
+a product's own list is recomputed when its brand, category, size or active
+flag changes (see products/signals.py), and import jobs recompute the lists
+of the products they wrote (rebuild_for_products()).
+
+Scoring every pair of a (category, brand) group is quadratic, so
+rebuild_all() only scores a bounded number of candidates per product.
+Without co-purchases, candidates with the same brand/category/size
+relation to a product score the same and ties go to the lowest id, so only
+the RELATED_LIMIT + 1 lowest ids of each such class can make the list;
+sizes only score when they are close (same rim, a few width and aspect
+steps), so the group classes are read from a window of neighbouring sizes.
+The lists are the same as when ranking whole groups.
+"""
+import bisect
+import math
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Q
+
+RELATED_LIMIT = 8
+SAME_BRAND_WEIGHT = 3.0
+SAME_CATEGORY_WEIGHT = 2.0
+SAME_SIZE_WEIGHT = 3.0
+COPURCHASE_WEIGHT = 1.5
+
+ROW_FIELDS = ('id', 'category_id', 'brand', 'width', 'aspect_ratio', 'rim_diameter')
+SIZE_DIMS = ('width', 'aspect_ratio', 'rim_diameter')
+# Sizes closer than this still score (size_score() is 0 from a 20 mm width or 10 point aspect gap)
+NEAR_WIDTH = 19
+NEAR_ASPECT = 9
+# From this many products, rebuild_for_products() rebuilds the whole table
+REBUILD_ALL_FROM = 200
+
+
+def size_score(row, other):
+    """SAME_SIZE_WEIGHT for an identical size, decreasing with the dimension gap"""
+    dims = SIZE_DIMS
+    if any(row[d] is None or other[d] is None for d in dims):
+        return 0.0
+    if all(row[d] == other[d] for d in dims):
+        return SAME_SIZE_WEIGHT
+    gap = (
+        abs(row['width'] - other['width']) / 10
+        + abs(row['aspect_ratio'] - other['aspect_ratio']) / 5
+        + abs(row['rim_diameter'] - other['rim_diameter']) * 2
+    )
+    return max(0.0, SAME_SIZE_WEIGHT - 1 - gap)
+
+
+def score(row, other, copurchases):
+    value = size_score(row, other)
+    if row['brand'] and row['brand'].lower() == (other['brand'] or '').lower():
+        value += SAME_BRAND_WEIGHT
+    if row['category_id'] == other['category_id']:
+        value += SAME_CATEGORY_WEIGHT
+    if copurchases:
+        value += COPURCHASE_WEIGHT * math.log1p(copurchases)
+    return value
+
+
+def load_copurchases(product_ids=None):
+    """product id -> Counter(other product id -> number of orders containing both)"""
+    from orders.models import OrderItem
+
+    items = OrderItem.objects.exclude(product_id__isnull=True).exclude(product_id='')
+    if product_ids is not None:
+        orders = OrderItem.objects.filter(product_id__in=[str(pk) for pk in product_ids]).values('order_id')
+        items = items.filter(order_id__in=orders)
+
+    by_order = defaultdict(set)
+    for order_id, product_id in items.values_list('order_id', 'product_id'):
+        if str(product_id).isdigit():
+            by_order[order_id].add(int(product_id))
+
+    copurchases = defaultdict(Counter)
+    for products in by_order.values():
+        for product_id in products:
+            for other_id in products:
+                if other_id != product_id:
+                    copurchases[product_id][other_id] += 1
+    return copurchases
+
+
+def rank_candidates(row, candidates, copurchased):
+    scored = [
+        (score(row, other, copurchased.get(other['id'], 0)), other['id'])
+        for other in candidates if other['id'] != row['id']
+    ]
+    scored.sort(key=lambda item: (-item[0], item[1]))
+    return [(related_id, value) for value, related_id in scored[:RELATED_LIMIT] if value > 0]
+
+
+def _save_links(links_by_product):
+    from .models import RelatedProduct
+
+    with transaction.atomic():
+        RelatedProduct.objects.filter(product_id__in=list(links_by_product)).delete()
+        RelatedProduct.objects.bulk_create([
+            RelatedProduct(product_id=product_id, related_id=related_id, score=value)
+            for product_id, links in links_by_product.items()
+            for related_id, value in links
+        ], batch_size=1000)
+
+
+class _LowestIds(defaultdict):
+    """key -> the RELATED_LIMIT + 1 rows of lowest id (rows are added by increasing id)"""
+
+    def __init__(self):
+        super().__init__(list)
+
+    def add(self, key, row):
+        rows = self[key]
+        if len(rows) <= RELATED_LIMIT:
+            rows.append(row)
+
+
+def _near_sizes(sizes, width, aspect_ratio):
+    """(width, aspect ratio) pairs of `sizes` (sorted) that can score against the given size"""
+    start = bisect.bisect_left(sizes, (width - NEAR_WIDTH,))
+    end = bisect.bisect_right(sizes, (width + NEAR_WIDTH, math.inf))
+    return [size for size in sizes[start:end] if abs(size[1] - aspect_ratio) <= NEAR_ASPECT]
+
+
+def rebuild_all():
+    """Recompute the related list of every active product; returns the number of links written"""
+    from .models import Product, RelatedProduct
+
+    rows = list(Product.objects.filter(is_active=True).order_by('id').values(*ROW_FIELDS))
+    rows_by_id = {row['id']: row for row in rows}
+    brand_key = lambda row: (row['category_id'], (row['brand'] or '').lower())
+    size_key = lambda row: (row['width'], row['aspect_ratio'], row['rim_diameter'])
+    has_size = lambda row: all(row[d] is not None for d in SIZE_DIMS)
+
+    # Candidate classes: same (category, brand), same (category, brand) and size, same size
+    # (any brand/category, same brand, same category)
+    by_brand, by_brand_size = _LowestIds(), _LowestIds()
+    by_size, by_size_brand, by_size_category = _LowestIds(), _LowestIds(), _LowestIds()
+    brand_sizes = defaultdict(set)
+    for row in rows:
+        by_brand.add(brand_key(row), row)
+        if has_size(row):
+            by_brand_size.add((brand_key(row), size_key(row)), row)
+            brand_sizes[(brand_key(row), row['rim_diameter'])].add((row['width'], row['aspect_ratio']))
+        if row['width']:
+            by_size.add(size_key(row), row)
+            by_size_brand.add((size_key(row), (row['brand'] or '').lower()), row)
+            by_size_category.add((size_key(row), row['category_id']), row)
+    brand_sizes = {key: sorted(sizes) for key, sizes in brand_sizes.items()}
+
+    copurchases = load_copurchases()
+    links_by_product = {}
+    for row in rows:
+        copurchased = copurchases.get(row['id'], {})
+        group = brand_key(row)
+        candidates = {other['id']: other for other in by_brand[group]}
+        if has_size(row):
+            for width, aspect_ratio in _near_sizes(brand_sizes[(group, row['rim_diameter'])],
+                                                   row['width'], row['aspect_ratio']):
+                size = (width, aspect_ratio, row['rim_diameter'])
+                candidates.update((other['id'], other) for other in by_brand_size[(group, size)])
+        if row['width']:
+            size = size_key(row)
+            for others in (by_size[size], by_size_brand[(size, group[1])], by_size_category[(size, row['category_id'])]):
+                candidates.update((other['id'], other) for other in others)
+        candidates.update((pk, rows_by_id[pk]) for pk in copurchased if pk in rows_by_id)
+        links_by_product[row['id']] = rank_candidates(row, candidates.values(), copurchased)
+
+    # Inactive products keep no list
+    RelatedProduct.objects.exclude(product_id__in=list(rows_by_id)).delete()
+    _save_links(links_by_product)
+    return sum(len(links) for links in links_by_product.values())
+
+
+def rebuild_for_product(product):
+    """Recompute one product's list (a few queries), e.g. after it was edited"""
+    from .models import Product, RelatedProduct
+
+    if not product.is_active:
+        RelatedProduct.objects.filter(Q(product=product) | Q(related=product)).delete()
+        return 0
+
+    copurchased = load_copurchases([product.pk]).get(product.pk, {})
+    candidate_filter = Q(category_id=product.category_id, brand__iexact=product.brand) | Q(id__in=list(copurchased))
+    if product.width:
+        candidate_filter |= Q(width=product.width, aspect_ratio=product.aspect_ratio, rim_diameter=product.rim_diameter)
+    candidates = Product.objects.filter(candidate_filter, is_active=True).values(*ROW_FIELDS)
+
+    row = {field: getattr(product, field) for field in ROW_FIELDS}
+    links = rank_candidates(row, candidates, copurchased)
+    _save_links({product.pk: links})
+    return len(links)
+
+
+def rebuild_for_products(products):
+    """Recompute the lists of a queryset of products, e.g. the rows of an import; returns the number of links written
+
+    Large sets rebuild the whole table, which also ranks the new products
+    into the lists of the existing ones.
+    """
+    if products.count() >= REBUILD_ALL_FROM:
+        return rebuild_all()
+    return sum(rebuild_for_product(product) for product in products.iterator())
@@ -0,0 +1,109 @@
+"""
+Server-side cache of anonymous catalog responses.
+
+The serialized data of ProductListView, FeaturedProductsView,
+CategoryListView and product_filters is cached under the view name, the
+normalized query string and the catalog version (products/catalog.py). Any
+catalog change bumps the version, so stale entries are never read again and
+simply expire. Stock is not in these responses, and the stock moves of the
+cart, orders and purchases only bump the version when a product runs out of
+stock or comes back (Product.changes_catalog()), so the cache survives cart
+traffic. Authenticated requests always run the view.
+
+Hits and misses are counted in the cache itself; see response_cache_stats().
+"""
+import hashlib
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+
+from .catalog import get_catalog_version
+
+KEY_PREFIX = 'catalog_response'
+STATS_KEYS = {'hits': f'{KEY_PREFIX}:hits', 'misses': f'{KEY_PREFIX}:misses'}
+
+
+def cache_timeout():
+    return getattr(settings, 'PRODUCT_RESPONSE_CACHE_TIMEOUT', 300)
+
+
+def normalize_params(query_params):
+    """Query string with sorted keys and values and without empty parameters"""
+    items = []
+    for key in sorted(query_params):
+        values = sorted(value.strip() for value in query_params.getlist(key) if value.strip())
+        items.extend((key, value) for value in values)
+    return urlencode(items)
+
+
+def response_cache_key(request, view_name):
+    params = hashlib.md5(normalize_params(request.query_params).encode()).hexdigest()
+    # Pagination links are absolute URLs
+    return f"{KEY_PREFIX}:{get_catalog_version()}:{view_name}:{request.get_host()}:{params}"
+
+
+def _count(stat):
+    key = STATS_KEYS[stat]
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:  # evicted between add() and incr()
+            cache.set(key, 1, None)
+
+
+def response_cache_stats():
+    hits = cache.get(STATS_KEYS['hits'], 0)
+    misses = cache.get(STATS_KEYS['misses'], 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / total, 3) if total else None,
+        'catalog_version': get_catalog_version(),
+    }
+
+
+def cached_catalog_response(request, view_name, get_response):
+    """Serve `get_response()`'s data from the cache for anonymous GET requests"""
+    timeout = cache_timeout()
+    if not timeout or request.method != 'GET' or request.user.is_authenticated:
+        return get_response()
+
+    key = response_cache_key(request, view_name)
+    data = cache.get(key)
+    if data is not None:
+        _count('hits')
+        response = Response(data)
+        response['X-Cache'] = 'HIT'
+        return response
+
+    _count('misses')
+    response = get_response()
+    if response.status_code == 200:
+        cache.set(key, response.data, timeout)
+    response['X-Cache'] = 'MISS'
+    return response
+
+
+def cache_catalog_response(view_name):
+    """Decorator for function views (below @api_view)"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            return cached_catalog_response(request, view_name, lambda: view(request, *args, **kwargs))
+        return wrapper
+    return decorator
+
+
+class CachedCatalogResponseMixin:
+    """Same cache for generic views; `response_cache_name` defaults to the class name"""
+    response_cache_name = None
+
+    def get(self, request, *args, **kwargs):
+        def get_response():
+            return super(CachedCatalogResponseMixin, self).get(request, *args, **kwargs)
+
+        return cached_catalog_response(request, self.response_cache_name or type(self).__name__, get_response)
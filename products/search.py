@@ -0,0 +1,82 @@
+"""
+PostgreSQL full-text search for products.
+
+Product.search_vector stores a weighted tsvector (name/reference > brand >
+size > description) using the French configuration, indexed with GIN. It is
+kept up to date by Product.save() and by the Excel importers through
+refresh_search_vectors(). On other databases the search filters fall back to
+DRF's ILIKE based SearchFilter.
+"""
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import F, FloatField
+from django.db.models.functions import Cast
+from rest_framework.filters import OrderingFilter, SearchFilter
+
+SEARCH_CONFIG = 'french'
+
+# Fields whose change requires recomputing the vector
+SEARCH_FIELDS = ('name', 'reference', 'brand', 'size', 'description')
+
+
+def fulltext_available():
+    return connection.vendor == 'postgresql'
+
+
+def product_search_vector():
+    return (
+        SearchVector('name', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('reference', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('brand', weight='B', config=SEARCH_CONFIG)
+        + SearchVector('size', weight='C', config=SEARCH_CONFIG)
+        + SearchVector('description', weight='D', config=SEARCH_CONFIG)
+    )
+
+
+def refresh_search_vectors(queryset):
+    """Recompute the stored vector for every product in `queryset` with one UPDATE"""
+    if not fulltext_available():
+        return 0
+    return queryset.update(search_vector=product_search_vector())
+
+
+class ProductSearchFilter(SearchFilter):
+    """SearchFilter that uses the stored tsvector when full-text mode is on.
+
+    Full-text mode is enabled globally with PRODUCT_SEARCH_MODE = 'fulltext',
+    or per request with ?search_mode=fulltext (?search_mode=basic forces ILIKE).
+    """
+    mode_param = 'search_mode'
+
+    def use_fulltext(self, request):
+        mode = request.query_params.get(self.mode_param) or getattr(settings, 'PRODUCT_SEARCH_MODE', 'basic')
+        return mode == 'fulltext' and fulltext_available()
+
+    def filter_queryset(self, request, queryset, view):
+        if not self.use_fulltext(request):
+            return super().filter_queryset(request, queryset, view)
+
+        terms = ' '.join(self.get_search_terms(request))
+        if not terms:
+            return queryset
+
+        query = SearchQuery(terms, config=SEARCH_CONFIG, search_type='websearch')
+        # ts_rank() is a real: as a double precision, keyset cursors compare equal to the stored rank
+        return queryset.filter(search_vector=query).annotate(
+            search_rank=Cast(SearchRank(F('search_vector'), query), FloatField())
+        )
+
+
+class RankedOrderingFilter(OrderingFilter):
+    """Order full-text results by relevance unless the client asked for an ordering"""
+
+    def get_default_ordering(self, view):
+        ordering = super().get_default_ordering(view)
+        if getattr(self, '_ranked', False):
+            return ['-search_rank'] + list(ordering or [])
+        return ordering
+
+    def filter_queryset(self, request, queryset, view):
+        self._ranked = 'search_rank' in queryset.query.annotations
+        return super().filter_queryset(request, queryset, view)
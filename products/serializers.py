@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import Product, Category, SiteSettings
+from .models import Product, Category, ImportJob, ImportUpload, RelatedProduct, SiteSettings
+from .catalog import category_product_counts
 
 class CategorySerializer(serializers.ModelSerializer):
     product_count = serializers.SerializerMethodField()
@@ -9,10 +10,49 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'slug', 'description', 'product_count')
 
     def get_product_count(self, obj):
-        return obj.products.filter(is_active=True).count()
+        # Counts for every category come from one cached GROUP BY, not a COUNT per row
+        return category_product_counts().get(obj.id, 0)
 
-class ProductSerializer(serializers.ModelSerializer):
-    category = CategorySerializer(read_only=True)
+class CategorySummarySerializer(serializers.ModelSerializer):
+    """Category as nested in products: no product count"""
+
+    class Meta:
+        model = Category
+        fields = ('id', 'name', 'slug', 'description')
+
+class SparseFieldsMixin:
+    """Serializer accepting `fields=(...)` to keep only those of its fields"""
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+# Model columns behind the computed ProductSerializer fields, for .only()
+PRODUCT_FIELD_COLUMNS = {
+    'category': ('category', 'category__id', 'category__name', 'category__slug', 'category__description'),
+    'is_on_sale': ('price', 'old_price'),
+    'discount_percentage': ('price', 'old_price'),
+    'season_display': ('season',),
+}
+
+# What the catalog grid shows (?view=card)
+PRODUCT_CARD_FIELDS = (
+    'id', 'name', 'slug', 'price', 'old_price', 'image', 'brand', 'size', 'season', 'season_display',
+    'is_on_sale', 'discount_percentage',
+)
+
+def product_columns(field_names):
+    """Columns to load with .only() to serialize `field_names`"""
+    columns = {'id'}
+    for name in field_names:
+        columns.update(PRODUCT_FIELD_COLUMNS.get(name, (name,)))
+    return sorted(columns)
+
+class ProductSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    category = CategorySummarySerializer(read_only=True)
     is_on_sale = serializers.ReadOnlyField()
     discount_percentage = serializers.ReadOnlyField()
     season_display = serializers.SerializerMethodField()
@@ -22,13 +62,23 @@ class ProductSerializer(serializers.ModelSerializer):
         fields = (
             'id', 'name', 'slug', 'description', 'price', 'old_price',
             'category', 'image', 'image_2', 'image_3', 'brand', 'size', 'season', 'season_display',
-            'stock', 'is_featured', 'is_on_sale', 'discount_percentage',
+            'is_featured', 'is_on_sale', 'discount_percentage',
             'created_at', 'reference', 'designation', 'type', 'emplacement', 'fabrication_date'
         )
 
     def get_season_display(self, obj):
         return obj.get_season_display()
 
+class ProductWithStockSerializer(ProductSerializer):
+    """Product with its current stock, for responses that are never cached (cart, product edit).
+
+    The catalog responses leave stock out (it changes with every cart action
+    and would invalidate them); clients read it from /availability/.
+    """
+
+    class Meta(ProductSerializer.Meta):
+        fields = ProductSerializer.Meta.fields + ('stock',)
+
 class ProductDetailSerializer(ProductSerializer):
     """Extended serializer for product detail view"""
     related_products = serializers.SerializerMethodField()
@@ -37,12 +87,21 @@ class ProductDetailSerializer(ProductSerializer):
         fields = ProductSerializer.Meta.fields + ('related_products',)
 
     def get_related_products(self, obj):
-        # Get related products from same category and brand
-        related = Product.objects.filter(
-            category=obj.category,
-            brand=obj.brand,
-            is_active=True
-        ).exclude(id=obj.id)[:4]
+        # Precomputed by products/related.py: one query for the ids, one to hydrate them
+        related_ids = list(
+            RelatedProduct.objects.filter(product=obj).order_by('-score').values_list('related_id', flat=True)[:4]
+        )
+        if related_ids:
+            products = Product.objects.filter(id__in=related_ids, is_active=True).select_related('category')
+            by_id = {product.id: product for product in products}
+            related = [by_id[pk] for pk in related_ids if pk in by_id]
+        else:
+            # Not computed yet (new product): same category and brand
+            related = Product.objects.filter(
+                category=obj.category,
+                brand=obj.brand,
+                is_active=True
+            ).exclude(id=obj.id).select_related('category')[:4]
         
         return ProductSerializer(related, many=True, context=self.context).data
 
@@ -52,4 +111,24 @@ class ProductDetailSerializer(ProductSerializer):
 class SiteSettingsSerializer(serializers.ModelSerializer):
     class Meta:
         model = SiteSettings
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+
+class ImportJobSerializer(serializers.ModelSerializer):
+    progress = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = ImportJob
+        fields = [
+            'id', 'kind', 'mode', 'status', 'original_name', 'progress', 'total_rows', 'rows_processed',
+            'created_count', 'updated_count', 'unchanged_count', 'error_count', 'images_uploaded', 'errors', 'result',
+            'cancel_requested', 'attempt', 'created_at', 'started_at', 'finished_at', 'heartbeat_at',
+        ]
+
+
+class ImportUploadSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ImportUpload
+        fields = [
+            'token', 'kind', 'mode', 'status', 'original_name', 'size', 'received', 'job', 'created_at', 'updated_at',
+        ]
@@ -0,0 +1,29 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .catalog import bump_catalog_version, in_catalog_batch
+from .models import RELATED_FIELDS, Category, Product
+from .related import rebuild_for_product
+
+
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def catalog_changed(sender, **kwargs):
+    bump_catalog_version()
+
+
+@receiver(post_save, sender=Product)
+def product_saved(sender, instance, **kwargs):
+    # Cart and order stock moves keep the ETags and catalog caches valid
+    if instance.changes_catalog():
+        bump_catalog_version()
+
+
+@receiver(post_save, sender=Product)
+def refresh_related_products(sender, instance, created, **kwargs):
+    # Stock updates from the cart don't change what a product is related to
+    if in_catalog_batch() or not instance.changed_fields() & set(RELATED_FIELDS):
+        return
+    transaction.on_commit(lambda: rebuild_for_product(instance))
@@ -0,0 +1,76 @@
+"""
+Unique product slugs for bulk imports.
+
+Imports used to probe `Product.objects.filter(slug=...).exists()` for
+"base", "base-1", "base-2"... on every row: one query per attempt, quadratic
+when many rows share a base such as "pneu-laufenn-205-55r16". SlugAllocator
+loads the existing slugs of all the base slugs of a batch in one query and
+hands out the same suffixes (first free "-N") from memory.
+
+Another import (or an admin edit) can still take a slug between allocation
+and insert. Inserts therefore run in a savepoint; on IntegrityError the
+caller calls refresh() for the bases involved, allocates again and retries
+(see products/importer.py).
+"""
+from django.db.models import Q
+
+# Room kept at the end of a truncated slug for the "-N" suffix
+SUFFIX_ROOM = 8
+
+# Attempts to insert a row whose slug was taken concurrently
+SLUG_RETRIES = 3
+
+
+class SlugAllocator:
+    def __init__(self, model=None, field='slug'):
+        if model is None:
+            from .models import Product as model
+        self.model = model
+        self.field = field
+        self.max_length = model._meta.get_field(field).max_length
+        self._taken = {}  # load prefix -> slugs taken (in the database or by this allocator)
+        self._next = {}   # base -> next suffix to try
+
+    def _prefix(self, base):
+        return base[:self.max_length - SUFFIX_ROOM]
+
+    def load(self, bases):
+        """Fetch the existing slugs for the bases not loaded yet, in one query"""
+        prefixes = {self._prefix(base) for base in bases if base} - set(self._taken)
+        if not prefixes:
+            return
+        condition = Q()
+        for prefix in prefixes:
+            condition |= Q(**{f'{self.field}__startswith': prefix})
+        for prefix in prefixes:
+            self._taken[prefix] = set()
+        for slug in self.model.objects.filter(condition).values_list(self.field, flat=True):
+            for prefix in prefixes:
+                if slug.startswith(prefix):
+                    self._taken[prefix].add(slug)
+
+    def refresh(self, bases):
+        """Forget what is known about the bases (after a conflicting insert); the next allocate() reloads them"""
+        for base in bases:
+            self._taken.pop(self._prefix(base), None)
+            self._next.pop(base, None)
+
+    def _candidate(self, base, counter):
+        if counter == 0:
+            return base[:self.max_length]
+        suffix = f'-{counter}'
+        return base[:self.max_length - len(suffix)].rstrip('-') + suffix
+
+    def allocate(self, base):
+        """First free slug among base, base-1, base-2..., reserved for this allocator"""
+        self.load([base])
+        taken = self._taken[self._prefix(base)]
+        counter = self._next.get(base, 0)
+        slug = self._candidate(base, counter)
+        while slug in taken:
+            counter += 1
+            slug = self._candidate(base, counter)
+        taken.add(slug)
+        self._next[base] = counter + 1
+        return slug
+
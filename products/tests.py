@@ -0,0 +1,475 @@
+import io
+import os
+import tempfile
+import threading
+import time
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db.models import FloatField
+from django.db.models.functions import Cast
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from pneushop.pagination import OptionalCursorPagination
+from products.equivalent_sizes import equivalent_products
+from products.image_uploads import content_hash, upload_images
+from products.import_uploads import UploadError, create_upload
+from products.importer import import_number
+from products.management.commands.check_tyre_extraction import reference_attributes
+from products.models import Category, ImportedImage, ImportJob, Product, RelatedProduct, VehicleFitment
+from products.related import ROW_FIELDS, rank_candidates, rebuild_all
+from products.search import ProductSearchFilter
+from products.tyre_attributes import extract_attributes
+from products.tyre_size import SIZE_FIELDS, parse_tyre_size
+from products.upsert import ExistingProducts
+
+TESTDATA_DIR = os.path.join(os.path.dirname(__file__), 'testdata')
+
+
+def staff_client(role='purchasing'):
+    user = get_user_model().objects.create_user(email=f'{role}@example.com', password='x', username=role, role=role)
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+def read_names(file_name):
+    """One product name per line, kept as is (blank lines are empty names)"""
+    with open(os.path.join(TESTDATA_DIR, file_name), encoding='utf-8') as names_file:
+        return [line.rstrip('\n') for line in names_file]
+
+
+@override_settings(CATALOG_VERSION_TTL=0, PRODUCT_RESPONSE_CACHE_TIMEOUT=300)
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(name='Continental', slug='continental')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product = Product.objects.create(
+                name='CONTINENTAL 205/55R16 91V PREMIUMCONTACT 6', slug='continental-205-55r16', description='',
+                price=Decimal('89.90'), category=category, brand='Continental', size='205/55R16',
+                season='summer', stock=8,
+            )
+
+    def get_list(self):
+        response = self.client.get('/api/products/')
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def save(self, **changes):
+        # Like the cart, order and purchase views: a plain save() of a loaded product
+        product = Product.objects.get(pk=self.product.pk)
+        for field, value in changes.items():
+            setattr(product, field, value)
+        with self.captureOnCommitCallbacks(execute=True):
+            product.save()
+
+    def test_stock_moves_keep_cached_responses(self):
+        self.assertEqual(self.get_list()['X-Cache'], 'MISS')
+        self.save(stock=7)
+        self.save(stock=6, stock_min=2)
+        response = self.get_list()
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertNotIn('stock', response.json()['results'][0])
+
+    def test_running_out_of_stock_invalidates(self):
+        self.get_list()
+        self.save(stock=0)
+        self.assertEqual(self.get_list()['X-Cache'], 'MISS')
+
+    def test_catalog_changes_invalidate(self):
+        self.get_list()
+        self.save(price=Decimal('79.90'))
+        self.assertEqual(self.get_list()['X-Cache'], 'MISS')
+
+
+class TyreAttributesParityTests(SimpleTestCase):
+    """extract_attributes() must match the per-row reference functions of the imports"""
+
+    def assert_parity(self, names, descriptions):
+        for name, description, attributes in zip(names, descriptions, extract_attributes(names, descriptions)):
+            with self.subTest(name=name, description=description):
+                self.assertEqual(attributes, reference_attributes(name, description))
+
+    def test_corpus(self):
+        names = read_names('tyre_names.txt')
+        self.assertIn('', names)
+        self.assert_parity(names, [''] * len(names))
+
+    def test_descriptions(self):
+        names = read_names('tyre_names.txt')[:6]
+        descriptions = [None, 'Pneu hiver', 'SUV tout-terrain', 'Fourgon utilitaire', 'Sport', float('nan')]
+        self.assert_parity(names, descriptions)
+
+
+class TyreSizeTests(SimpleTestCase):
+    def test_half_inch_rim_is_not_parsed(self):
+        for text in ('215/75R17.5 126/124M', '315/80 R22,5 156/150L'):
+            with self.subTest(text=text):
+                self.assertEqual(parse_tyre_size(text), dict.fromkeys(SIZE_FIELDS))
+        with self.assertRaises(ValueError):
+            equivalent_products('215/75R17.5')
+
+
+class MemoryImage:
+    """Embedded workbook image stand-in: read() returns the same bytes every time"""
+
+    def __init__(self, data):
+        self.data = data
+
+    def read(self):
+        return self.data
+
+
+class CountingUploader:
+    """Uploader stand-in counting its calls and how many run at the same time"""
+
+    def __init__(self, fail=(), delay=0):
+        self.fail = set(fail)
+        self.delay = delay
+        self.uploads = []
+        self.running = 0
+        self.max_running = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, data):
+        with self.lock:
+            self.uploads.append(data)
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        try:
+            time.sleep(self.delay)
+            if data in self.fail:
+                raise ConnectionError('upload refused')
+            return f"https://images.example.com/{content_hash(data)}.jpg"
+        finally:
+            with self.lock:
+                self.running -= 1
+
+
+class UploadImagesTests(TestCase):
+    def test_duplicates_upload_once(self):
+        uploader = CountingUploader()
+        images = [MemoryImage(b'front'), MemoryImage(b'side'), MemoryImage(b'front'), MemoryImage(b'front')]
+        urls = upload_images(images, uploader=uploader, workers=2)
+
+        self.assertEqual(sorted(uploader.uploads), [b'front', b'side'])
+        self.assertEqual(urls[0], urls[2])
+        self.assertEqual(urls[0], urls[3])
+        self.assertNotEqual(urls[0], urls[1])
+        self.assertEqual(ImportedImage.objects.count(), 2)
+
+    def test_second_run_reuses_urls(self):
+        images = [MemoryImage(b'front'), MemoryImage(b'side')]
+        first = upload_images(images, uploader=CountingUploader(), workers=2)
+
+        uploader = CountingUploader()
+        self.assertEqual(upload_images(images, uploader=uploader, workers=2), first)
+        self.assertEqual(uploader.uploads, [])
+
+    def test_failed_upload(self):
+        uploader = CountingUploader(fail={b'broken'})
+        urls = upload_images([MemoryImage(b'front'), MemoryImage(b'broken')], uploader=uploader, workers=2)
+
+        self.assertIsNotNone(urls[0])
+        self.assertIsNone(urls[1])
+        self.assertFalse(ImportedImage.objects.filter(content_hash=content_hash(b'broken')).exists())
+        # Not recorded, so the next import tries again
+        retry = CountingUploader()
+        self.assertIsNotNone(upload_images([MemoryImage(b'broken')], uploader=retry, workers=2)[0])
+        self.assertEqual(retry.uploads, [b'broken'])
+
+    def test_pool_is_bounded(self):
+        uploader = CountingUploader(delay=0.02)
+        images = [MemoryImage(f'image {number}'.encode()) for number in range(12)]
+        urls = upload_images(images, uploader=uploader, workers=3)
+
+        self.assertEqual(len(uploader.uploads), 12)
+        self.assertTrue(all(urls))
+        self.assertLessEqual(uploader.max_running, 3)
+        self.assertGreater(uploader.max_running, 1)
+
+
+@mock.patch.object(OptionalCursorPagination, 'page_size', 5)
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Continental', slug='continental')
+        # Few distinct prices, so pages start and end inside runs of equal prices
+        for number in range(23):
+            Product.objects.create(
+                name=f'PNEU CONTINENTAL 205/55R16 91V N{number}', slug=f'continental-{number}', description='',
+                price=Decimal(80 + number % 4), category=category, brand='Continental', size='205/55R16',
+                season='summer',
+            )
+
+    def walk(self, url, link):
+        ids = []
+        while url:
+            data = self.client.get(url).json()
+            ids.extend(product['id'] for product in data['results'])
+            url = data[link]
+        return ids
+
+    def test_pages_follow_the_ordering(self):
+        for ordering in ('price', '-price', 'name', '-created_at'):
+            with self.subTest(ordering=ordering):
+                expected = list(Product.objects.order_by(ordering, '-id' if ordering.startswith('-') else 'id')
+                                .values_list('id', flat=True))
+                forward = self.walk(f'/api/products/?pagination=cursor&ordering={ordering}', 'next')
+                self.assertEqual(forward, expected)
+
+    def test_previous_links(self):
+        url = '/api/products/?pagination=cursor&ordering=price'
+        while True:
+            data = self.client.get(url).json()
+            if not data['next']:
+                break
+            url = data['next']
+        last_page = [product['id'] for product in data['results']]
+        backward = self.walk(data['previous'], 'previous')
+        expected = list(Product.objects.order_by('price', 'id').values_list('id', flat=True))
+        self.assertEqual(sorted(backward + last_page), sorted(expected))
+        self.assertEqual(len(backward + last_page), len(expected))
+
+    def test_cursor_keeps_the_search_ranking(self):
+        # Stand-in for the full-text filter (PostgreSQL only): a rank annotation the ordering filter follows
+        def rank(self, request, queryset, view):
+            return queryset.annotate(search_rank=Cast('price', FloatField()))
+
+        with mock.patch.object(ProductSearchFilter, 'filter_queryset', rank):
+            ranked = self.walk('/api/products/?pagination=cursor&search=continental', 'next')
+        expected = list(Product.objects.order_by('-price', '-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(ranked, expected)
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get('/api/products/?cursor=cD1ub3Rqc29u').status_code, 404)
+
+
+class RelatedProductsTests(TestCase):
+    def test_rebuild_matches_ranking_whole_groups(self):
+        categories = [Category.objects.create(name=name, slug=name) for name in ('tourisme', '4x4')]
+        # Neighbouring sizes come last, past the lowest ids of each (category, brand) group
+        sizes = ['Unknown', '195/65R15', '225/45R17', '205/55R16', '185/65R14', '215/55R16', '205/60R16']
+        for number in range(90):
+            Product.objects.create(
+                name=f'PNEU N{number}', slug=f'pneu-{number}', description='', price=Decimal('80.00'),
+                category=categories[number % 7 % 2], brand=('Continental', 'MICHELIN', 'michelin')[number % 3],
+                size=sizes[number * len(sizes) // 90], season='summer', is_active=number % 11 != 0,
+            )
+        rebuild_all()
+
+        rows = list(Product.objects.filter(is_active=True).values(*ROW_FIELDS))
+        for row in rows:
+            # Every product of the same category and brand, and of the same size
+            candidates = [
+                other for other in rows
+                if (other['category_id'], (other['brand'] or '').lower()) == (row['category_id'], row['brand'].lower())
+                or (row['width'] and (other['width'], other['aspect_ratio'], other['rim_diameter'])
+                    == (row['width'], row['aspect_ratio'], row['rim_diameter']))
+            ]
+            expected = [related_id for related_id, value in rank_candidates(row, candidates, {})]
+            links = RelatedProduct.objects.filter(product_id=row['id']).order_by('-score', 'related_id')
+            self.assertEqual(list(links.values_list('related_id', flat=True)), expected)
+
+    def test_import_rebuilds_imported_products(self):
+        rows = ['NOM;PRIX TTC', 'PNEU CONTINENTAL 205/55R16 91V;89.90', 'PNEU CONTINENTAL 205/55R16 94V;92.50']
+        upload = SimpleUploadedFile('prices.csv', ('\n'.join(rows) + '\n').encode())
+        response = self.client.post('/api/products/import/fast/?sync=true', {'file': upload})
+
+        self.assertEqual(response.status_code, 200, response.content)
+        first, second = Product.objects.order_by('id')
+        self.assertEqual(list(RelatedProduct.objects.filter(product=first).values_list('related_id', flat=True)),
+                         [second.pk])
+        self.assertEqual(list(RelatedProduct.objects.filter(product=second).values_list('related_id', flat=True)),
+                         [first.pk])
+
+
+class ExistingProductsTests(TestCase):
+    def test_name_match_ignores_case_and_whitespace(self):
+        category = Category.objects.create(name='Continental', slug='continental')
+        product = Product.objects.create(
+            name=' PNEU  CONTINENTAL\t205/55R16 91V ', slug='pneu-continental-205-55r16', description='',
+            price=Decimal('89.90'), category=category, brand='Continental', size='205/55R16', season='summer',
+        )
+        row = Product(name='pneu continental 205/55r16\u00a091v')
+
+        existing = ExistingProducts()
+        existing.load([row])
+        self.assertEqual(existing.find(row), product)
+
+
+class ImportFileTypeTests(TestCase):
+    def test_legacy_xls_is_refused(self):
+        for url in ('/api/products/import/excel/', '/api/products/import/fast/', '/api/products/import/preview/',
+                    '/api/products/import/test/'):
+            with self.subTest(url=url):
+                upload = SimpleUploadedFile('prices.xls', b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1')
+                response = self.client.post(url, {'file': upload})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('.xlsx', response.json()['error'])
+
+        with self.assertRaisesMessage(UploadError, '.xls'):
+            create_upload('prices.xls', 1024)
+        response = staff_client().post('/api/products/import/uploads/', {'filename': 'prices.xls', 'size': 1024})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('.xlsx', response.json()['error'])
+
+    def test_supported_formats(self):
+        formats = self.client.get('/api/products/import/preview/').json()['expected_format']['supported_formats']
+        self.assertEqual(formats, ['.xlsx', '.csv', '.parquet'])
+
+
+@override_settings(CATALOG_VERSION_TTL=0)
+class ProductUpdateViewTests(TestCase):
+    def test_stock_change_fails_revalidation(self):
+        category = Category.objects.create(name='Continental', slug='continental')
+        product = Product.objects.create(
+            name='PNEU CONTINENTAL 205/55R16 91V', slug='continental-205-55r16', description='',
+            price=Decimal('89.90'), category=category, brand='Continental', size='205/55R16', season='summer',
+            stock=8,
+        )
+        user = get_user_model().objects.create_user(email='achats@example.com', password='x', username='achats')
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+        url = f'/api/products/{product.pk}/'
+
+        response = self.client.get(url)
+        self.assertEqual(response.json()['stock'], 8)
+        etag = response['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # Like the purchase flows: a stock-only save, which keeps the catalog version
+        product = Product.objects.get(pk=product.pk)
+        product.stock = 3
+        with self.captureOnCommitCallbacks(execute=True):
+            product.save(update_fields=['stock'])
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['stock'], 3)
+
+
+class ImportAccessTests(TestCase):
+    def test_uploads_require_admin_or_purchasing(self):
+        token = '00000000-0000-0000-0000-000000000000'
+        requests = (
+            ('post', '/api/products/import/uploads/', {'filename': 'prices.xlsx', 'size': 1024}),
+            ('get', f'/api/products/import/uploads/{token}/', None),
+            ('put', f'/api/products/import/uploads/{token}/?offset=0', {}),
+            ('post', f'/api/products/import/uploads/{token}/complete/', {'sha256': '0' * 64}),
+        )
+        customer = staff_client('customer')
+        for method, url, data in requests:
+            for client in (APIClient(), customer):
+                with self.subTest(method=method, url=url):
+                    self.assertIn(getattr(client, method)(url, data).status_code, (401, 403))
+
+        self.assertEqual(staff_client().get(f'/api/products/import/uploads/{token}/').status_code, 404)
+
+    def test_jobs_require_admin_or_purchasing(self):
+        requests = (
+            ('get', '/api/products/import/jobs/'),
+            ('get', '/api/products/import/jobs/1/'),
+            ('post', '/api/products/import/jobs/1/cancel/'),
+            ('post', '/api/products/import/jobs/1/resume/'),
+        )
+        customer = staff_client('customer')
+        for method, url in requests:
+            for client in (APIClient(), customer):
+                with self.subTest(method=method, url=url):
+                    self.assertIn(getattr(client, method)(url).status_code, (401, 403))
+
+        self.assertEqual(staff_client().get('/api/products/import/jobs/').status_code, 200)
+
+
+class SyncImportTests(TestCase):
+    def post_sync(self):
+        upload = SimpleUploadedFile('prices.csv', 'NOM;PRIX TTC\nPNEU CONTINENTAL 205/55R16 91V;89.90\n'.encode())
+        return self.client.post('/api/products/import/fast/?sync=true', {'file': upload})
+
+    def test_job_claimed_by_another_worker(self):
+        with mock.patch('products.import_views.run_job', return_value=None):
+            response = self.post_sync()
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['job']['status'], 'pending')
+
+    def test_cancelled_job_without_result(self):
+        def cancel(pk):
+            ImportJob.objects.filter(pk=pk).update(status='cancelled', result=None)
+
+        with mock.patch('products.import_views.run_job', side_effect=cancel):
+            response = self.post_sync()
+        self.assertEqual(response.status_code, 400)
+
+
+class CsvImportTests(TestCase):
+    def test_french_export(self):
+        rows = [
+            'NOM;PRIX TTC;STOCK;DESCRIPTION',
+            'PNEU CONTINENTAL 205/55R16 91V ECOCONTACT 6;89,90;12;Pneu été',
+            'PNEU MICHELIN 225/45R17 94Y PILOT SPORT 4;1\u00a0299,5;3,0;',
+            'PNEU LAUFENN 195/65R15 91H;75.00;4;',
+        ]
+        upload = SimpleUploadedFile('prices.csv', ('\n'.join(rows) + '\n').encode('utf-8-sig'))
+        response = self.client.post('/api/products/import/excel/?sync=true', {'file': upload})
+
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()['summary']['errors'], 0)
+        prices = dict(Product.objects.values_list('brand', 'price'))
+        self.assertEqual(prices, {
+            'Continental': Decimal('89.90'), 'Michelin': Decimal('1299.50'), 'Laufenn': Decimal('75.00'),
+        })
+        self.assertEqual(Product.objects.get(brand='Michelin').stock, 3)
+
+    def test_import_number(self):
+        for text, expected in (('299,5', 299.5), ('1 299,50', 1299.5), ('1.299,50', 1299.5),
+                               ('1,299.50', 1299.5), (' 42 ', 42.0), (12, 12.0)):
+            with self.subTest(text=text):
+                self.assertEqual(import_number(text), expected)
+
+
+class ProductBulkTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Continental', slug='continental')
+        cls.product = Product.objects.create(
+            name='PNEU CONTINENTAL 205/55R16 91V', slug='continental-205-55r16', description='',
+            price=Decimal('89.90'), category=category, brand='Continental', size='205/55R16', season='summer',
+        )
+
+    def test_invalid_ids(self):
+        response = self.client.get(f'/api/products/bulk/?ids={self.product.pk},abc,-1')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('abc', response.json()['error'])
+
+    def test_missing_ids(self):
+        data = self.client.get(f'/api/products/bulk/?ids={self.product.pk + 1},{self.product.pk}').json()
+        self.assertEqual([product['id'] for product in data['results']], [self.product.pk])
+        self.assertEqual(data['missing'], [self.product.pk + 1])
+
+    def test_fields_like_sparse_fieldsets(self):
+        url = f'/api/products/bulk/?ids={self.product.pk}&fields='
+        self.assertEqual(self.client.get(url + 'id,price,nope').json()['results'], [{'id': self.product.pk, 'price': '89.90'}])
+        # No known field: all of them, as on the product list
+        self.assertIn('name', self.client.get(url + 'nope').json()['results'][0])
+
+
+class LoadVehicleFitmentsTests(TestCase):
+    def load(self, *rows):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as csv_file:
+            csv_file.write('\n'.join(['make;model;years;size', *rows]) + '\n')
+        self.addCleanup(os.unlink, csv_file.name)
+        call_command('load_vehicle_fitments', csv_file.name, stdout=io.StringIO())
+
+    def test_make_spelling_replaces_fitments(self):
+        self.load('BMW;Serie 1;2012-2019;205/55R16 91V', 'Peugeot;208;2012-2019;195/55R16 87H')
+        self.load('Bmw;Serie 1;2012-2019;225/45R17 91W', 'bmw;Serie 3;2012-2019;225/50R17 94W')
+
+        fitments = VehicleFitment.objects.order_by('make', 'model').values_list('make', 'model', 'width')
+        self.assertEqual(list(fitments), [('Bmw', 'Serie 1', 225), ('Bmw', 'Serie 3', 225), ('Peugeot', '208', 195)])
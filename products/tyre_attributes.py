@@ -0,0 +1,119 @@
+"""
+Column-wise tyre attribute extraction for the imports.
+
+extract_tire_info(), determine_season() and determine_category() in
+products/importer.py work on one name at a time and recompile their
+patterns on each call. extract_attributes() computes the same brand, size,
+structured size columns, season and category for a whole batch of names
+with pandas string methods and precompiled patterns.
+
+The per-row functions stay the reference implementation:
+`python manage.py check_tyre_extraction` compares both over the product
+names of the catalog (or a file of names), and products/tests.py over the
+names of products/testdata/tyre_names.txt (add new edge cases there).
+"""
+import re
+
+import pandas as pd
+
+from .tyre_size import SIZE_FIELDS, TYRE_SIZE_RE
+
+PREFIX_RE = re.compile(r'^(PNEU|TIRE|TYRE)\s+', re.IGNORECASE)
+BRAND_WORD_RE = re.compile(r'[A-Za-z]+')
+IMPORT_SIZE_RE = re.compile(r'(\d{2,3}[/]\d{2}\s?[RrXx]?\s?\d{1,2})', re.IGNORECASE)
+MISSING_R_RE = re.compile(r'^(\d+)/(\d{2})(.*)$')
+
+SEASON_KEYWORDS = (
+    ('winter', ('winter', 'hiver', 'neige', 'snow')),
+    ('summer', ('summer', 'été', 'sport')),
+)
+DEFAULT_SEASON = 'all_season'
+
+# Checked in this order, first match wins
+CATEGORY_KEYWORDS = (
+    ('tourisme', ('tourisme', 'tourism', 'passenger', 'car', 'voiture')),
+    ('4x4', ('4x4', '4wd', 'suv', 'tout-terrain', 'off-road')),
+    ('agricole', ('agricole', 'agricultural', 'farm', 'tracteur', 'tractor')),
+    ('utilitaire', ('utilitaire', 'utility', 'commercial', 'van', 'fourgon', 'camionnette')),
+    ('moto', ('moto', 'motorcycle', 'scooter', 'bike')),
+)
+DEFAULT_CATEGORY = 'tourisme'
+
+ATTRIBUTE_COLUMNS = ('brand', 'size', 'season', 'category', *SIZE_FIELDS)
+
+
+def _keywords_re(keywords):
+    return re.compile('|'.join(re.escape(keyword) for keyword in keywords))
+
+
+SEASON_PATTERNS = tuple((season, _keywords_re(keywords)) for season, keywords in SEASON_KEYWORDS)
+CATEGORY_PATTERNS = tuple((category, _keywords_re(keywords)) for category, keywords in CATEGORY_KEYWORDS)
+
+
+def _first_match(text, patterns, default):
+    result = pd.Series(default, index=text.index, dtype=object)
+    decided = pd.Series(False, index=text.index)
+    for value, pattern in patterns:
+        found = text.str.contains(pattern) & ~decided
+        result[found] = value
+        decided |= found
+    return result
+
+
+def _brands(names):
+    first_words = names.str.strip().str.replace(PREFIX_RE, '', regex=True).str.split(n=1).str[0]
+    is_word = first_words.str.fullmatch(BRAND_WORD_RE, na=False).astype(bool)
+    return first_words.str.capitalize().where(is_word, 'Unknown')
+
+
+def _sizes(names):
+    sizes = names.str.extract(IMPORT_SIZE_RE, expand=False)
+    sizes = sizes.str.replace(r'\s+', '', regex=True).str.upper().str.replace('X', 'R', regex=False)
+    # Add R if missing (e.g., 205/55 16 -> 205/55R16)
+    missing_r = sizes.notna() & ~sizes.str.contains('R', regex=False, na=True).astype(bool)
+    sizes[missing_r] = sizes[missing_r].str.replace(MISSING_R_RE, r'\1/\2R\3', regex=True)
+    return sizes.fillna('Unknown')
+
+
+def _size_columns(names):
+    """parse_tyre_size() fields for every name"""
+    parts = names.str.extract(TYRE_SIZE_RE)
+    found = parts['width'].notna() & parts['half'].isna()
+    width = pd.to_numeric(parts['width'])
+    aspect = pd.to_numeric(parts['aspect'])
+    rim = pd.to_numeric(parts['rim'])
+    # Same float operations as tyre_size.overall_diameter, rounded by Python's round()
+    diameters = rim * 25.4 + 2 * width * aspect / 100
+    has_load = found & parts['load'].notna()
+
+    def column(values, mask):
+        return [value if keep else None for value, keep in zip(values, mask)]
+
+    return {
+        'width': column(width.fillna(0).astype(int).tolist(), found),
+        'aspect_ratio': column(aspect.fillna(0).astype(int).tolist(), found),
+        'rim_diameter': column(rim.fillna(0).astype(int).tolist(), found),
+        'load_index': column(pd.to_numeric(parts['load']).fillna(0).astype(int).tolist(), has_load),
+        'speed_rating': column(parts['speed'].str.upper().tolist(), has_load),
+        'construction': column(parts['construction'].fillna('R').str.upper().tolist(), found),
+        'overall_diameter': column([round(value, 1) for value in diameters.fillna(0).tolist()], found),
+    }
+
+
+def extract_attributes(names, descriptions):
+    """One dict of ATTRIBUTE_COLUMNS per name (same results as the per-row functions)"""
+    # str() like the per-row functions (a missing description reads as "None")
+    names = pd.Series(list(names), dtype=object).map(str)
+    descriptions = pd.Series(list(descriptions), dtype=object).map(str)
+    if names.empty:
+        return []
+    text = (names + ' ' + descriptions).str.lower()
+
+    columns = {
+        'brand': _brands(names).tolist(),
+        'size': _sizes(names).tolist(),
+        'season': _first_match(text, SEASON_PATTERNS, DEFAULT_SEASON).tolist(),
+        'category': _first_match(text, CATEGORY_PATTERNS, DEFAULT_CATEGORY).tolist(),
+        **_size_columns(names),
+    }
+    return [dict(zip(columns, values)) for values in zip(*columns.values())]
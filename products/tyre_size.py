@@ -0,0 +1,64 @@
+import re
+
+# Matches tyre sizes as they appear in product names and in Product.size:
+#   "205/55R16", "205/55 R 16 91V", "215/60R16C 103T", "225/45ZR17 94W XL"
+# Half-inch rims of truck tyres ("215/75R17.5") are left unparsed: rim_diameter holds whole inches
+TYRE_SIZE_RE = re.compile(
+    r'(?P<width>\d{3}|\d{2})\s*/\s*(?P<aspect>\d{2})\s*'
+    r'(?P<construction>ZR|[RDB])?\s*-?\s*(?P<rim>\d{2})(?P<half>[.,]5)?'
+    r'(?P<commercial>C\b)?'
+    r'(?:\s*(?P<load>\d{2,3})(?:/\d{2,3})?\s?(?P<speed>[A-HJ-NP-Z])\b)?',
+    re.IGNORECASE,
+)
+
+SIZE_FIELDS = (
+    'width', 'aspect_ratio', 'rim_diameter', 'load_index', 'speed_rating', 'construction', 'overall_diameter',
+)
+
+# Speed ratings from slowest to fastest (ZR sits between V and W)
+SPEED_RATINGS = ('L', 'M', 'N', 'P', 'Q', 'R', 'S', 'T', 'U', 'H', 'V', 'Z', 'W', 'Y')
+
+
+def parse_tyre_size(text):
+    """Parse a tyre size out of free text.
+
+    Returns a dict with width, aspect_ratio, rim_diameter, load_index,
+    speed_rating, construction and overall_diameter (None for anything not
+    found, or for a half-inch rim size).
+    """
+    result = dict.fromkeys(SIZE_FIELDS)
+    if not text:
+        return result
+
+    match = TYRE_SIZE_RE.search(str(text))
+    if not match or match.group('half'):
+        return result
+
+    result['width'] = int(match.group('width'))
+    result['aspect_ratio'] = int(match.group('aspect'))
+    result['rim_diameter'] = int(match.group('rim'))
+    # "205/55 16" has no construction letter: radial is by far the most common
+    result['construction'] = (match.group('construction') or 'R').upper()
+    result['overall_diameter'] = overall_diameter(result['width'], result['aspect_ratio'], result['rim_diameter'])
+    if match.group('load'):
+        result['load_index'] = int(match.group('load'))
+        result['speed_rating'] = match.group('speed').upper()
+    return result
+
+
+def format_tyre_size(width, aspect_ratio, rim_diameter, construction='R'):
+    """Canonical size string, e.g. 205/55R16"""
+    return f"{width}/{aspect_ratio}{construction or 'R'}{rim_diameter}"
+
+
+def overall_diameter(width, aspect_ratio, rim_diameter):
+    """Rolling diameter in mm: rim + two sidewalls (width x aspect ratio)"""
+    return round(rim_diameter * 25.4 + 2 * width * aspect_ratio / 100, 1)
+
+
+def speed_ratings_from(rating):
+    """`rating` and every faster one; None for an unknown rating"""
+    rating = (rating or '').upper()
+    if rating not in SPEED_RATINGS:
+        return None
+    return SPEED_RATINGS[SPEED_RATINGS.index(rating):]
@@ -0,0 +1,118 @@
+"""
+Upsert mode of the product imports (?mode=upsert).
+
+Re-importing a supplier price list used to create "-1", "-2" duplicates of
+every product. In upsert mode an import row matches an existing product by
+Product.reference (set from the REFERENCE column of upsert imports), and
+otherwise by normalized name (case and whitespace insensitive), looked up
+in Product.name_key, which holds normalize_name() of the name. The
+candidates of a whole batch are loaded with one query; the fields a row
+provides are compared with the product, and only products with a
+difference are written, with one bulk_update per batch.
+
+Stock is only updated from a filled STOCK cell, and empty descriptions or
+missing images in the file do not clear the existing ones.
+"""
+from django.db.models import Q
+from django.utils import timezone
+
+from .tyre_size import SIZE_FIELDS
+
+IMPORT_MODES = ('create', 'upsert')
+
+# Fields an import row can change on an existing product
+UPSERT_FIELDS = (
+    'name', 'reference', 'brand', 'size', 'description', 'price', 'stock', 'category', 'season',
+    'image', 'image_2', 'image_3', *SIZE_FIELDS,
+)
+
+
+def normalize_name(name):
+    """Import name matching key; saved in Product.name_key, so the database and Python compare alike"""
+    return ' '.join(str(name).split()).lower()
+
+
+def _value(product, field):
+    return getattr(product, product._meta.get_field(field).attname)
+
+
+def changed_fields(match, product, fields):
+    """The `fields` whose value differs between an existing product and an import row's product"""
+    return [field for field in fields if _value(match, field) != _value(product, field)]
+
+
+class ExistingProducts:
+    """Products matching the rows of an import, by reference and by normalized name"""
+
+    def __init__(self):
+        self.by_reference = {}
+        self.by_name = {}
+
+    def add(self, product):
+        if product.reference:
+            self.by_reference.setdefault(product.reference, product)
+        self.by_name.setdefault(normalize_name(product.name), product)
+
+    def load(self, products):
+        """Fetch the candidates of a batch of unsaved products in one query"""
+        from .models import Product
+
+        references = {product.reference for product in products if product.reference} - set(self.by_reference)
+        names = {normalize_name(product.name) for product in products} - set(self.by_name)
+        if not references and not names:
+            return
+        candidates = Product.objects.filter(Q(reference__in=references) | Q(name_key__in=names)).order_by('id')
+        for product in candidates:
+            self.add(product)
+
+    def find(self, product):
+        if product.reference and product.reference in self.by_reference:
+            return self.by_reference[product.reference]
+        return self.by_name.get(normalize_name(product.name))
+
+
+def plan_upsert(parsed, existing):
+    """Split (index, product, base slug, fields) rows into creations and updates.
+
+    Returns (rows to create, {existing product: changed fields}, unchanged
+    count). Existing products are modified in place; a product appearing on
+    several rows takes the values of the last one.
+    """
+    existing.load([product for index, product, base, fields in parsed])
+    to_create, changed, unchanged = [], {}, 0
+    for index, product, base, fields in parsed:
+        match = existing.find(product)
+        if match is None:
+            to_create.append((index, product, base))
+            existing.add(product)
+            continue
+
+        differences = changed_fields(match, product, fields)
+        for field in differences:
+            setattr(match, match._meta.get_field(field).attname, _value(product, field))
+        if match.pk is None:
+            continue  # repeated row of a product created by this batch
+        if differences:
+            changed.setdefault(match, set()).update(differences)
+        elif match not in changed:
+            unchanged += 1
+    return to_create, changed, unchanged
+
+
+def apply_updates(changed):
+    """bulk_update the changed products (one statement per batch); returns them"""
+    from .models import Product
+
+    if not changed:
+        return []
+    products = list(changed)
+    fields = set().union(*changed.values())
+    # bulk_update bypasses auto_now (the bitmap index and ETags follow updated_at)
+    now = timezone.now()
+    for product in products:
+        product.updated_at = now
+        product.name_key = normalize_name(product.name)
+    if 'name' in fields:
+        fields.add('name_key')
+    Product.objects.bulk_update(products, [*sorted(fields), 'updated_at'])
+    return products
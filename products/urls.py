@@ -7,11 +7,23 @@ urlpatterns = [
     path('categories/', views.CategoryListView.as_view(), name='categories'),
     path('search-suggestions/', views.product_search_suggestions, name='search_suggestions'),
     path('filters/', views.product_filters, name='product_filters'),
+    path('availability/', views.product_availability, name='product_availability'),
+    path('bulk/', views.product_bulk, name='product_bulk'),
+    path('equivalent-sizes/', views.equivalent_sizes, name='equivalent_sizes'),
+    path('vehicles/', views.vehicle_tree, name='vehicle_tree'),
+    path('by-vehicle/', views.VehicleProductListView.as_view(), name='products_by_vehicle'),
         # Excel import endpoints
     path('import/excel/', import_views.import_products_excel, name='import_excel'),        # Full import with images
     path('import/fast/', import_views.import_products_fast, name='import_fast'),           # Fast bulk import
     path('import/test/', import_views.quick_import_test, name='quick_import_test'),        # Test endpoint  
     path('import/preview/', import_views.import_preview, name='import_preview'),
+    path('import/jobs/', import_views.import_jobs, name='import_jobs'),
+    path('import/jobs/<int:pk>/', import_views.import_job_detail, name='import_job_detail'),
+    path('import/jobs/<int:pk>/cancel/', import_views.cancel_import_job, name='cancel_import_job'),
+    path('import/jobs/<int:pk>/resume/', import_views.resume_import_job, name='resume_import_job'),
+    path('import/uploads/', import_views.import_uploads, name='import_uploads'),
+    path('import/uploads/<uuid:token>/', import_views.import_upload_detail, name='import_upload_detail'),
+    path('import/uploads/<uuid:token>/complete/', import_views.complete_import_upload, name='complete_import_upload'),
     path('site-settings/', views.site_settings, name='site_settings'),
 
     # Product update endpoint - must come before slug patterns
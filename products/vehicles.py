@@ -0,0 +1,152 @@
+"""
+Search by vehicle.
+
+products.VehicleFitment lists the original equipment tyre sizes of each
+vehicle (make, model, version, years). It is loaded from CSV/Excel by
+`python manage.py load_vehicle_fitments`.
+
+A vehicle resolves to products with a single query: an EXISTS subquery
+joins the fitments to the indexed structured size columns of Product
+(width, aspect_ratio, rim_diameter), and requires a load index and speed
+rating at least as high as the original ones when those are known.
+
+The make -> model -> years tree for the dropdowns is built with one query
+and cached per catalog version (the loader bumps it).
+"""
+import datetime
+
+from django.core.cache import cache
+from django.db.models import Case, Exists, IntegerField, OuterRef, Q, Value, When
+
+from .catalog import get_catalog_version
+from .tyre_size import SPEED_RATINGS, parse_tyre_size
+
+VEHICLE_TREE_TIMEOUT = 60 * 60 * 24
+
+# Accepted column headers (lowercased) for load_vehicle_fitments
+COLUMN_ALIASES = {
+    'make': ('make', 'marque', 'constructeur'),
+    'model': ('model', 'modele', 'modèle'),
+    'variant': ('variant', 'version', 'motorisation'),
+    'year_start': ('year_start', 'annee_debut', 'année_début', 'from'),
+    'year_end': ('year_end', 'annee_fin', 'année_fin', 'to'),
+    'years': ('years', 'year', 'annees', 'années', 'annee', 'année'),
+    'axle': ('axle', 'essieu'),
+    'size': ('size', 'taille', 'dimension', 'dimensions'),
+}
+
+AXLES = {'both': 'both', 'front': 'front', 'rear': 'rear', 'avant': 'front', 'arriere': 'rear', 'arrière': 'rear'}
+
+
+def speed_rank(field):
+    """SQL rank of a speed rating column in SPEED_RATINGS order (NULL when unknown)"""
+    return Case(
+        *[When(**{field: rating}, then=Value(rank)) for rank, rating in enumerate(SPEED_RATINGS)],
+        default=None,
+        output_field=IntegerField(),
+    )
+
+
+def fitment_filter(make, model, year=None, variant=None):
+    """Filter on `Product` rows fitting the vehicle (a correlated EXISTS)"""
+    from .models import VehicleFitment
+
+    fitments = VehicleFitment.objects.filter(
+        make__iexact=make,
+        model__iexact=model,
+        width=OuterRef('width'),
+        aspect_ratio=OuterRef('aspect_ratio'),
+        rim_diameter=OuterRef('rim_diameter'),
+    )
+    if year:
+        fitments = fitments.filter(
+            Q(year_start__isnull=True) | Q(year_start__lte=year),
+            Q(year_end__isnull=True) | Q(year_end__gte=year),
+        )
+    if variant:
+        fitments = fitments.filter(variant__iexact=variant)
+    fitments = fitments.annotate(fitment_speed_rank=speed_rank('speed_rating')).filter(
+        Q(load_index__isnull=True) | Q(load_index__lte=OuterRef('load_index')),
+        Q(fitment_speed_rank__isnull=True) | Q(fitment_speed_rank__lte=OuterRef('speed_rank')),
+    )
+    return Exists(fitments)
+
+
+def products_for_vehicle(queryset, make, model, year=None, variant=None):
+    return queryset.annotate(speed_rank=speed_rank('speed_rating')).filter(
+        fitment_filter(make, model, year=year, variant=variant)
+    )
+
+
+def build_vehicle_tree():
+    """[{make, models: [{model, variants, years}]}] from every fitment row"""
+    from .models import VehicleFitment
+
+    current_year = datetime.date.today().year
+    tree = {}
+    rows = VehicleFitment.objects.values_list('make', 'model', 'variant', 'year_start', 'year_end').distinct()
+    for make, model, variant, year_start, year_end in rows:
+        entry = tree.setdefault(make, {}).setdefault(model, {'variants': set(), 'years': set()})
+        if variant:
+            entry['variants'].add(variant)
+        if year_start or year_end:
+            entry['years'].update(range(year_start or year_end, (year_end or current_year) + 1))
+
+    return [
+        {
+            'make': make,
+            'models': [
+                {'model': model, 'variants': sorted(entry['variants']), 'years': sorted(entry['years'])}
+                for model, entry in sorted(models.items(), key=lambda item: item[0].lower())
+            ],
+        }
+        for make, models in sorted(tree.items(), key=lambda item: item[0].lower())
+    ]
+
+
+def get_vehicle_tree():
+    key = f"vehicle_tree:{get_catalog_version()}"
+    tree = cache.get(key)
+    if tree is None:
+        tree = build_vehicle_tree()
+        cache.set(key, tree, VEHICLE_TREE_TIMEOUT)
+    return tree
+
+
+def _year(value):
+    try:
+        year = int(float(value))
+    except (TypeError, ValueError):
+        return None
+    return year if 1900 <= year <= 2100 else None
+
+
+def fitment_from_row(row):
+    """VehicleFitment field values from a file row (dict of normalized headers), or None if unusable"""
+    text = lambda key: str(row.get(key) or '').strip()
+    make, model = text('make'), text('model')
+    size = parse_tyre_size(text('size'))
+    if not make or not model or size['width'] is None:
+        return None
+
+    year_start, year_end = _year(row.get('year_start')), _year(row.get('year_end'))
+    years = text('years')
+    if years and year_start is None and year_end is None:
+        # "2012-2019", "2012-" or "2015"
+        start, dash, end = years.partition('-')
+        year_start = _year(start)
+        year_end = _year(end) if dash else year_start
+
+    return {
+        'make': make,
+        'model': model,
+        'variant': text('variant'),
+        'year_start': year_start,
+        'year_end': year_end,
+        'axle': AXLES.get(text('axle').lower(), 'both'),
+        'width': size['width'],
+        'aspect_ratio': size['aspect_ratio'],
+        'rim_diameter': size['rim_diameter'],
+        'load_index': size['load_index'],
+        'speed_rating': size['speed_rating'],
+    }
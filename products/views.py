@@ -7,28 +7,167 @@ from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 
 from .models import Product, Category, SiteSettings
-from .serializers import ProductSerializer,ProductDetailSerializer, CategorySerializer, SiteSettingsSerializer
+from .serializers import (
+    PRODUCT_CARD_FIELDS, ProductSerializer, ProductDetailSerializer, ProductWithStockSerializer, CategorySerializer,
+    SiteSettingsSerializer,
+    product_columns,
+)
+from .search import ProductSearchFilter, RankedOrderingFilter
+from .autocomplete import get_index as get_autocomplete_index
+from .facets import compute_facets, load_facet_groups, product_facets
+from .catalog import get_catalog_state
+from .response_cache import CachedCatalogResponseMixin, cache_catalog_response
+from .fast_serialization import ProductRowRenderer, fast_serialization_enabled
+from .bitmap_index import bitmap_index_enabled, get_bitmap_index
+from .equivalent_sizes import default_tolerance, describe_size, difference_percent, equivalent_products
+from .tyre_size import format_tyre_size
+from .vehicles import get_vehicle_tree, products_for_vehicle
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.db.models import Q
 from django.db import models
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+import hashlib
 
-class ProductListView(generics.ListAPIView):
-    queryset = Product.objects.filter(is_active=True)
+AVAILABILITY_MAX_IDS = 200
+BULK_MAX_ITEMS = 200
+
+
+def _int_or_none(value):
+    """Query params come in as strings; junk values should match nothing, not 500"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+class CatalogConditionalMixin:
+    """Conditional GET (ETag / Last-Modified) for catalog responses.
+
+    Every catalog change bumps the catalog version (products/catalog.py), so
+    (version, path) validates any catalog representation. Browsers and the CDN
+    keep the body and revalidate; while nothing changed they get an empty 304.
+    Stock is not part of these representations: cart, order and purchase
+    stock moves only bump the version when a product runs out of stock or
+    comes back, and clients read current stock from product_availability.
+    """
+    cache_control = 'public, max-age=0, must-revalidate'
+
+    def get_catalog_validators(self, request):
+        version, changed_at = get_catalog_state()
+        path_hash = hashlib.md5(request.get_full_path().encode()).hexdigest()[:16]
+        last_modified = int(changed_at.timestamp()) if changed_at else None
+        return f'"catalog-{version}-{path_hash}"', last_modified
+
+    def get(self, request, *args, **kwargs):
+        etag, last_modified = self.get_catalog_validators(request)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if request.method in ('GET', 'HEAD'):
+            response['Cache-Control'] = self.cache_control
+        else:
+            response['Cache-Control'] = 'no-cache, no-store, must-revalidate'
+        return response
+
+
+def requested_fields(query_params, allowed):
+    """Fields asked with ?view=card or ?fields= (unknown names ignored), or None for all of them"""
+    if query_params.get('view') == 'card':
+        return PRODUCT_CARD_FIELDS
+    fields = query_params.get('fields')
+    if not fields:
+        return None
+    requested = tuple(name for name in (f.strip() for f in fields.split(',')) if name in allowed)
+    return requested or None
+
+
+class SparseFieldsetMixin:
+    """?fields=id,name,price or ?view=card: serialize, and SELECT, only those fields"""
+
+    def get_requested_fields(self):
+        return requested_fields(self.request.query_params, self.get_serializer_class().Meta.fields)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = self.get_requested_fields()
+        if fields is None:
+            return queryset
+        if 'category' not in fields:
+            queryset = queryset.select_related(None)
+        return queryset.only(*product_columns(fields + self.get_ordering_columns()))
+
+    def get_ordering_columns(self):
+        # Keyset pagination reads the ordering columns off the last row
+        return tuple(getattr(self, 'ordering_fields', ())) + tuple(
+            field.lstrip('-') for field in getattr(self, 'ordering', None) or ()
+        )
+
+    def get_serializer(self, *args, **kwargs):
+        fields = self.get_requested_fields()
+        if fields is not None:
+            kwargs.setdefault('fields', fields)
+        return super().get_serializer(*args, **kwargs)
+
+
+class ProductListView(SparseFieldsetMixin, CatalogConditionalMixin, CachedCatalogResponseMixin, generics.ListAPIView):
+    queryset = Product.objects.filter(is_active=True).select_related('category')
     serializer_class = ProductSerializer
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, ProductSearchFilter, RankedOrderingFilter]
     filterset_fields = ['category', 'brand', 'season', 'is_featured']
     search_fields = ['name', 'brand', 'description', 'size']
     ordering_fields = ['price', 'created_at', 'name']
     ordering = ['-created_at']
     permission_classes = [AllowAny]
+    use_bitmap_index = True
 
-    def finalize_response(self, request, response, *args, **kwargs):
-        response = super().finalize_response(request, response, *args, **kwargs)
-        # Prevent caching of product stock data
-        response['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-        response['Pragma'] = 'no-cache'
-        response['Expires'] = '0'
-        return response
+    def list(self, request, *args, **kwargs):
+        if self.use_bitmap_index and bitmap_index_enabled():
+            response = self.list_from_bitmap_index(request)
+            if response is not None:
+                return response
+
+        if not fast_serialization_enabled():
+            return super().list(request, *args, **kwargs)
+
+        # Same output as ProductSerializer, from .values() rows (products/fast_serialization.py)
+        renderer = ProductRowRenderer(fields=self.get_requested_fields(), context=self.get_serializer_context())
+        queryset = self.filter_queryset(self.get_queryset())
+        columns = set(renderer.columns) | set(self.get_ordering_columns()) | set(queryset.query.annotations)
+        rows = queryset.values(*columns)
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(renderer.render(page))
+        return Response(renderer.render(rows))
+
+    def list_from_bitmap_index(self, request):
+        """Filter, count and order in the in-memory bitmap index; only the page is read from the database"""
+        ids = get_bitmap_index().query(request.query_params)
+        if ids is None:
+            return None
+        page = self.paginate_queryset(ids)
+        page_ids = [int(pk) for pk in (ids if page is None else page)]
+
+        queryset = self.get_queryset().filter(id__in=page_ids).order_by()
+        if fast_serialization_enabled():
+            renderer = ProductRowRenderer(fields=self.get_requested_fields(), context=self.get_serializer_context())
+            rows = {row['id']: row for row in queryset.values(*renderer.columns)}
+            data = renderer.render(rows[pk] for pk in page_ids if pk in rows)
+        else:
+            products = {product.id: product for product in queryset}
+            data = self.get_serializer([products[pk] for pk in page_ids if pk in products], many=True).data
+
+        if page is None:
+            return Response(data)
+        return self.get_paginated_response(data)
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -59,100 +198,207 @@ class ProductListView(generics.ListAPIView):
             queryset = queryset.filter(price__lte=max_price)
         if on_sale == 'true':
             queryset = queryset.filter(old_price__isnull=False, old_price__gt=0)
+        if self.request.query_params.get('in_stock') == 'true':
+            queryset = queryset.filter(stock__gt=0)
 
-        # Filter by size string "205/55R16"
+        # Structured size columns (indexed), e.g. 205/55R16 91V
+        size_filters = {}
         if width:
-            queryset = queryset.filter(size__startswith=width + "/")
+            size_filters['width'] = _int_or_none(width)
         if height:
-            queryset = queryset.filter(size__icontains="/" + height)
+            size_filters['aspect_ratio'] = _int_or_none(height)
         if diameter:
-            queryset = queryset.filter(size__iendswith=str(diameter))
+            size_filters['rim_diameter'] = _int_or_none(diameter)
+        if load_index:
+            # A higher load index can always replace a lower one
+            size_filters['load_index__gte'] = _int_or_none(load_index)
+        if None in size_filters.values():
+            return queryset.none()
         if speed_rating:
-            queryset = queryset.filter(size__icontains=speed_rating)
-        # load_index not stored yet unless you add a field
+            size_filters['speed_rating'] = speed_rating.strip().upper()
+        if size_filters:
+            queryset = queryset.filter(**size_filters)
 
         return queryset
 
 
-class ProductDetailView(generics.RetrieveAPIView):
-    queryset = Product.objects.filter(is_active=True)
+class VehicleProductListView(ProductListView):
+    """Products fitting a vehicle (?make=Peugeot&model=208&year=2016&variant=...), with every list filter"""
+    use_bitmap_index = False
+
+    def get_queryset(self):
+        make = self.request.query_params.get('make', '').strip()
+        model = self.request.query_params.get('model', '').strip()
+        year = self.request.query_params.get('year')
+        if not make or not model:
+            raise ValidationError({'error': 'make et model sont requis'})
+        if year and _int_or_none(year) is None:
+            raise ValidationError({'error': 'year doit être un nombre'})
+
+        return products_for_vehicle(
+            super().get_queryset(), make, model,
+            year=_int_or_none(year) if year else None,
+            variant=self.request.query_params.get('variant', '').strip() or None,
+        )
+
+
+class ProductDetailView(CatalogConditionalMixin, generics.RetrieveAPIView):
+    queryset = Product.objects.filter(is_active=True).select_related('category')
     serializer_class = ProductDetailSerializer
     lookup_field = 'slug'
     permission_classes = [AllowAny]
 
-    def finalize_response(self, request, response, *args, **kwargs):
-        response = super().finalize_response(request, response, *args, **kwargs)
-        # Prevent caching of product stock data
-        response['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-        response['Pragma'] = 'no-cache'
-        response['Expires'] = '0'
-        return response
-
-class ProductUpdateView(generics.RetrieveUpdateAPIView):
-    queryset = Product.objects.all()
-    serializer_class = ProductSerializer
+class ProductUpdateView(CatalogConditionalMixin, generics.RetrieveUpdateAPIView):
+    queryset = Product.objects.all().select_related('category')
+    serializer_class = ProductWithStockSerializer
     lookup_field = 'id'
     permission_classes = [IsAuthenticated]
+    cache_control = 'private, no-cache'
 
-    def finalize_response(self, request, response, *args, **kwargs):
-        response = super().finalize_response(request, response, *args, **kwargs)
-        # Prevent caching of product stock data
-        response['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-        response['Pragma'] = 'no-cache'
-        response['Expires'] = '0'
-        return response
+    def get_catalog_validators(self, request):
+        # This payload has stock, whose moves do not bump the catalog version
+        etag, last_modified = super().get_catalog_validators(request)
+        row = Product.objects.filter(id=self.kwargs['id']).values_list('stock', 'updated_at').first()
+        if row is None:
+            return etag, last_modified
+        stock, updated_at = row
+        updated = int(updated_at.timestamp())
+        return f'{etag[:-1]}-{stock}-{updated}"', max(last_modified or 0, updated)
 
-class CategoryListView(generics.ListAPIView):
+class CategoryListView(CachedCatalogResponseMixin, generics.ListAPIView):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [AllowAny]
 
-class FeaturedProductsView(generics.ListAPIView):
-    queryset = Product.objects.filter(is_active=True, is_featured=True)
+class FeaturedProductsView(SparseFieldsetMixin, CachedCatalogResponseMixin, generics.ListAPIView):
+    queryset = Product.objects.filter(is_active=True, is_featured=True).select_related('category')
     serializer_class = ProductSerializer
     permission_classes = [AllowAny]
 
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@cache_catalog_response('product_bulk')
+def product_bulk(request):
+    """Several products in one query, in request order: ?ids=3,1,2 or ?slugs=a,b (&fields= / &view=card)"""
+    if request.GET.get('ids'):
+        lookup = 'id'
+        keys = [pk.strip() for pk in request.GET['ids'].split(',') if pk.strip()]
+        invalid = [pk for pk in keys if not pk.isdigit()]
+        if invalid:
+            return Response({'error': f"Identifiants invalides: {', '.join(invalid)}"}, status=400)
+        keys = [int(pk) for pk in keys]
+    else:
+        lookup = 'slug'
+        keys = [slug.strip() for slug in request.GET.get('slugs', '').split(',') if slug.strip()]
+    keys = list(dict.fromkeys(keys))
+    if not keys:
+        return Response({'error': 'ids ou slugs est requis'}, status=400)
+    if len(keys) > BULK_MAX_ITEMS:
+        return Response({'error': f'{BULK_MAX_ITEMS} produits maximum par requête'}, status=400)
+
+    products = Product.objects.filter(is_active=True, **{f'{lookup}__in': keys}).select_related('category')
+    by_key = {getattr(product, lookup): product for product in products}
+    found = [by_key[key] for key in keys if key in by_key]
+
+    fields = requested_fields(request.GET, ProductSerializer.Meta.fields)
+    return Response({
+        'results': ProductSerializer(found, many=True, fields=fields, context={'request': request}).data,
+        'missing': [key for key in keys if key not in by_key],
+    })
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def product_availability(request):
+    """Current stock for a batch of products: ?ids=1,2,3 -> {"1": 4, "2": 0, ...}"""
+    ids = [int(pk) for pk in request.GET.get('ids', '').split(',') if pk.strip().isdigit()]
+    if not ids:
+        return Response({'error': 'ids est requis'}, status=400)
+    if len(ids) > AVAILABILITY_MAX_IDS:
+        return Response({'error': f'{AVAILABILITY_MAX_IDS} produits maximum par requête'}, status=400)
+
+    stock = Product.objects.filter(id__in=ids, is_active=True).values_list('id', 'stock')
+    response = Response({str(pk): quantity for pk, quantity in stock})
+    response['Cache-Control'] = 'no-cache, no-store, must-revalidate'
+    return response
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def product_search_suggestions(request):
-    """Get search suggestions for products"""
+    """Get search suggestions for products (served from the in-memory prefix index)"""
     query = request.GET.get('q', '')
     if len(query) < 2:
         return Response([])
-    
-    # Get brand suggestions
-    brands = Product.objects.filter(
-        Q(brand__icontains=query) & Q(is_active=True)
-    ).values_list('brand', flat=True).distinct()[:5]
-    
-    # Get product name suggestions
-    products = Product.objects.filter(
-        Q(name__icontains=query) & Q(is_active=True)
-    ).values_list('name', flat=True).distinct()[:5]
-    
-    suggestions = list(brands) + list(products)
-    return Response(suggestions[:10])
+
+    return Response(get_autocomplete_index().search(query, limit=10))
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def vehicle_tree(request):
+    """Make -> model -> variants/years for the search-by-vehicle dropdowns (?make= to get one make)"""
+    tree = get_vehicle_tree()
+    make = request.GET.get('make', '').strip().lower()
+    if make:
+        tree = [entry for entry in tree if entry['make'].lower() == make]
+    return Response(tree)
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@cache_catalog_response('equivalent_sizes')
+def equivalent_sizes(request):
+    """In-stock replacements for a tyre size: ?size=205/55R16 91V&tolerance=3 (percent of rolling diameter)"""
+    try:
+        tolerance = float(request.GET['tolerance']) if request.GET.get('tolerance') else None
+    except ValueError:
+        return Response({'error': 'tolerance doit être un nombre'}, status=400)
+    if tolerance is not None and not 0 < tolerance <= 10:
+        return Response({'error': 'tolerance doit être comprise entre 0 et 10'}, status=400)
+
+    try:
+        parsed, products = equivalent_products(request.GET.get('size', ''), tolerance=tolerance)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=400)
+
+    products = list(products.select_related('category'))
+    target = parsed['overall_diameter']
+    results = ProductSerializer(products, many=True, fields=PRODUCT_CARD_FIELDS).data
+    sizes = {}
+    for product, data in zip(products, results):
+        data['overall_diameter'] = product.overall_diameter
+        data['diameter_difference'] = difference_percent(product.overall_diameter, target)
+        label = format_tyre_size(product.width, product.aspect_ratio, product.rim_diameter, product.construction)
+        entry = sizes.setdefault(label, {
+            'size': label,
+            'overall_diameter': product.overall_diameter,
+            'diameter_difference': data['diameter_difference'],
+            'count': 0,
+        })
+        entry['count'] += 1
+
+    return Response({
+        'size': describe_size(parsed),
+        'overall_diameter': target,
+        'tolerance': default_tolerance() if tolerance is None else tolerance,
+        'sizes': list(sizes.values()),
+        'results': results,
+    })
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@cache_catalog_response('product_filters')
 def product_filters(request):
-    """Get available filter options"""
-    brands = Product.objects.filter(is_active=True).values_list('brand', flat=True).distinct().order_by('brand')
-    seasons = Product.objects.filter(is_active=True).values_list('season', flat=True).distinct()
-    
-    # Price range
-    price_range = Product.objects.filter(is_active=True).aggregate(
-        min_price=models.Min('price'),
-        max_price=models.Max('price')
-    )
-    
+    """Get available filter options, with per-value counts for the current filter set"""
+    # Unfiltered groups give the full option lists; both are cached per catalog version
+    catalog = compute_facets(load_facet_groups(), {})
+    season_labels = dict(Product._meta.get_field('season').choices)
+
     return Response({
-        'brands': list(brands),
+        'brands': sorted(catalog['counts']['brand']),
         'seasons': [
-            {'value': season, 'label': dict(Product._meta.get_field('season').choices)[season]}
-            for season in seasons
+            {'value': season, 'label': season_labels[season]}
+            for season in catalog['counts']['season']
         ],
-        'price_range': price_range
+        'price_range': catalog['price_range'],
+        **product_facets(request.query_params),
     })
 
 
@@ -0,0 +1,234 @@
+"""
+Streaming access to the product import workbooks.
+
+pd.read_excel(sheet_name=None) builds every sheet as a DataFrame and
+load_workbook() (needed for ws._images) parses the whole file a second time,
+so a 50 MB workbook ended up in memory several times. WorkbookReader opens
+the file with openpyxl in read_only mode and yields one dict per data row,
+sheet after sheet; only the current row is held in memory.
+
+Read-only worksheets do not expose their images, so iter_row_images() reads
+the drawing parts of the xlsx (zip) directly: anchors are parsed from the
+small drawing XML and the picture bytes are only read from the archive when
+the caller asks for them.
+
+Rows are numbered like the index of the concatenated DataFrame the import
+used to build (blank rows inside a sheet count, trailing ones do not), so
+the images of a row are still found at `index + 2` in the mapping built
+from the anchors (0-based row plus the row count of the previous sheets).
+"""
+import posixpath
+import zipfile
+from xml.etree import ElementTree
+
+from openpyxl import load_workbook
+
+MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+PACKAGE_REL_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+XDR_NS = 'http://schemas.openxmlformats.org/drawingml/2006/spreadsheetDrawing'
+DRAWING_NS = 'http://schemas.openxmlformats.org/drawingml/2006/main'
+
+# count_rows() calls its progress callback every this many rows
+COUNT_PROGRESS_ROWS = 1000
+
+
+def normalize_columns(headers):
+    """Import column names: stripped, upper-cased, REFERNECE typo fixed, blank headers as UNNAMED: n"""
+    columns = []
+    for position, header in enumerate(headers):
+        column = str(header).strip().upper() if header is not None and str(header).strip() else f'UNNAMED: {position}'
+        if column == 'REFERNECE':
+            column = 'REFERENCE'
+        if column in columns:
+            # pandas names duplicated headers "X.1", "X.2"...
+            suffix = 1
+            while f'{column}.{suffix}' in columns:
+                suffix += 1
+            column = f'{column}.{suffix}'
+        columns.append(column)
+
+    # Unnamed first column (sheet labels): product name when there is no other name column
+    if 'UNNAMED: 0' in columns and 'REFERENCE' not in columns and 'NOM' not in columns:
+        columns[columns.index('UNNAMED: 0')] = 'NOM'
+    return columns
+
+
+class WorkbookRow:
+    __slots__ = ('index', 'sheet', 'values')
+
+    def __init__(self, index, sheet, values):
+        self.index = index
+        self.sheet = sheet
+        self.values = values
+
+
+class WorkbookReader:
+    """Bounded-memory reader over the data rows of an xlsx workbook.
+
+    `sheets` limits the sheets read (None: all of them, in workbook order).
+    Use as a context manager, or call close().
+    """
+
+    def __init__(self, path, sheets=None, normalize=normalize_columns):
+        self.path = path
+        self.workbook = load_workbook(path, read_only=True, data_only=True)
+        names = self.workbook.sheetnames
+        self.sheet_names = names if sheets is None else [names[i] for i in sheets if i < len(names)]
+        self.normalize = normalize
+        self._columns = None
+        self._offsets = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.workbook.close()
+
+    def sheet_columns(self, name):
+        worksheet = self.workbook[name]
+        for header in worksheet.iter_rows(min_row=1, max_row=1, values_only=True):
+            return self.normalize(list(header))
+        return []
+
+    @property
+    def columns(self):
+        """Union of the normalized columns of the sheets, in order of appearance"""
+        if self._columns is None:
+            columns = {}
+            for name in self.sheet_names:
+                columns.update(dict.fromkeys(self.sheet_columns(name)))
+            self._columns = list(columns)
+        return self._columns
+
+    @property
+    def offsets(self):
+        """Sheet name -> row count of the previous sheets, for the image anchors"""
+        if self._offsets is None:
+            self._offsets, offset = {}, 0
+            for name in self.workbook.sheetnames:
+                self._offsets[name] = offset
+                worksheet = self.workbook[name]
+                rows = worksheet.max_row
+                if rows is None:
+                    # No <dimension> in the sheet: count the rows
+                    rows = sum(1 for _ in worksheet.iter_rows(values_only=True))
+                offset += rows
+        return self._offsets
+
+    def rows(self, skip=0):
+        """WorkbookRow per data row, after the first `skip` of them"""
+        index = 0
+        for name in self.sheet_names:
+            columns = None
+            blank_rows = 0
+            for values in self.workbook[name].iter_rows(values_only=True):
+                if columns is None:
+                    columns = self.normalize(list(values))
+                    continue
+                if all(value is None for value in values):
+                    # Kept only if a non-blank row follows, as pandas does
+                    blank_rows += 1
+                    continue
+                rows = [dict.fromkeys(columns)] * blank_rows + [dict(zip(columns, values))]
+                blank_rows = 0
+                for row in rows:
+                    if index >= skip:
+                        yield WorkbookRow(index, name, row)
+                    index += 1
+
+    def count_rows(self, progress=None):
+        """Number of data rows; `progress` (e.g. the job heartbeat) is called every COUNT_PROGRESS_ROWS rows"""
+        count = 0
+        for count, _ in enumerate(self.rows(), 1):
+            if progress is not None and count % COUNT_PROGRESS_ROWS == 0:
+                progress()
+        return count
+
+
+def _read_xml(archive, part):
+    try:
+        return ElementTree.fromstring(archive.read(part))
+    except KeyError:
+        return None
+
+
+def _relationships(archive, part):
+    """Relationship id -> (type, target part) of an OPC part"""
+    folder, filename = posixpath.split(part)
+    root = _read_xml(archive, posixpath.join(folder, '_rels', f'{filename}.rels'))
+    relationships = {}
+    if root is None:
+        return relationships
+    for rel in root.iter(f'{{{PACKAGE_REL_NS}}}Relationship'):
+        target = rel.get('Target', '')
+        if rel.get('TargetMode') == 'External':
+            continue
+        target = target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join(folder, target))
+        relationships[rel.get('Id')] = (rel.get('Type', ''), target)
+    return relationships
+
+
+def _sheet_parts(archive):
+    """[(sheet name, worksheet part)] in workbook order"""
+    workbook_part = 'xl/workbook.xml'
+    root = _read_xml(archive, workbook_part)
+    if root is None:
+        return []
+    relationships = _relationships(archive, workbook_part)
+    parts = []
+    for sheet in root.iter(f'{{{MAIN_NS}}}sheet'):
+        rel = relationships.get(sheet.get(f'{{{REL_NS}}}id'))
+        if rel:
+            parts.append((sheet.get('name'), rel[1]))
+    return parts
+
+
+class LazyImage:
+    """A picture of the workbook; the bytes are read from the archive on demand"""
+
+    def __init__(self, path, part):
+        self.path = path
+        self.part = part
+
+    def read(self):
+        with zipfile.ZipFile(self.path) as archive:
+            return archive.read(self.part)
+
+
+def iter_row_images(path, offsets=None):
+    """(row, sheet name, LazyImage) for every picture anchored to a cell, in document order.
+
+    `row` is the 0-based anchor row plus the rows of the previous sheets
+    (`offsets`, see WorkbookReader.offsets).
+    """
+    if offsets is None:
+        with WorkbookReader(path) as reader:
+            offsets = reader.offsets
+
+    with zipfile.ZipFile(path) as archive:
+        for name, sheet_part in _sheet_parts(archive):
+            drawings = [
+                target for rel_type, target in _relationships(archive, sheet_part).values()
+                if rel_type.endswith('/drawing')
+            ]
+            for drawing_part in drawings:
+                root = _read_xml(archive, drawing_part)
+                if root is None:
+                    continue
+                media = _relationships(archive, drawing_part)
+                for anchor in root:
+                    # absoluteAnchor has no cell: skipped, as openpyxl did
+                    if anchor.tag not in (f'{{{XDR_NS}}}twoCellAnchor', f'{{{XDR_NS}}}oneCellAnchor'):
+                        continue
+                    row = anchor.find(f'{{{XDR_NS}}}from/{{{XDR_NS}}}row')
+                    blip = anchor.find(f'{{{XDR_NS}}}pic/{{{XDR_NS}}}blipFill/{{{DRAWING_NS}}}blip')
+                    if row is None or blip is None:
+                        continue
+                    rel = media.get(blip.get(f'{{{REL_NS}}}embed'))
+                    if rel is None:
+                        continue
+                    yield offsets.get(name, 0) + int(row.text), name, LazyImage(path, rel[1])
@@ -63,6 +63,10 @@ class PurchaseOrder(models.Model):
         verbose_name = "Bon de Commande Fournisseur"
         verbose_name_plural = "Bons de Commande Fournisseurs"
         ordering = ['-order_date']
+        indexes = [
+            # Keyset pagination of PurchaseOrderViewSet (pneushop/pagination.py)
+            models.Index(fields=['order_date', 'id'], name='purchase_order_date_id_idx'),
+        ]
 
     def __str__(self):
         return f"Achat #{self.order_number} - {self.supplier.name}"